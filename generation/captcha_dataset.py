@@ -0,0 +1,219 @@
+"""
+Bulk generation of labelled captchas for training and regression sets.
+
+N captchas are split into shards of ``shard_size`` samples that are rendered in parallel, one shard per task:
+
+    tar / zip   one archive per shard (``shard-00000.tar`` ...) holding the encoded images and a
+                ``labels.tsv`` member with ``file<TAB>text`` lines
+    npy         one memory-mapped ``images.npy`` of shape (N, height, width, 3), uint8, which the workers
+                fill in place, plus ``labels.tsv`` with ``index<TAB>text`` lines
+
+Sample *i* is rendered with a seed derived from ``(seed, i)``, so a dataset is reproducible and does not
+depend on the number of workers or on the order in which shards finish. A shard only becomes visible once it
+is complete (written to a temporary name and renamed), so an interrupted run picks up where it stopped
+when it is started again with the same arguments.
+
+    python captcha_dataset.py out/ 1000000 --format npy --seed 42 -j 0
+"""
+import argparse
+import concurrent.futures
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+
+import numpy as np
+
+from captcha_generator import CaptchaConfig, render_captcha
+
+FORMATS = ("tar", "zip", "npy")
+SETTINGS_FILE = "dataset.json"
+LABELS_FILE = "labels.tsv"
+ARRAY_FILE = "images.npy"
+
+
+def sample_seed(seed, index):
+    """Seed of sample *index*; independent of sharding and workers."""
+    return f"{seed}:{index}"
+
+
+def _shard_path(out_dir, shard, format):
+    # the npy shards only write their labels, the pixels go straight into the shared array
+    suffix = "labels.tsv" if format == "npy" else format
+    return os.path.join(out_dir, f"shard-{shard:05d}.{suffix}")
+
+
+def _render_shard(job):
+    """Pool worker: render and store one shard, return ``(shard, samples, seconds)``."""
+    out_dir, shard, start, stop, format, config, seed, image_format, quality = job
+    started = time.perf_counter()
+    path = _shard_path(out_dir, shard, format)
+    tmp_path = path + ".tmp"
+    labels = []
+
+    if format == "npy":
+        images = np.load(os.path.join(out_dir, ARRAY_FILE), mmap_mode="r+")
+        for index in range(start, stop):
+            data, text = render_captcha(config, seed=sample_seed(seed, index), output="raw")
+            images[index] = np.frombuffer(data, dtype=np.uint8).reshape(images.shape[1:])
+            labels.append(f"{index}\t{text}\n")
+        images.flush()
+        del images
+        with open(tmp_path, "w") as f:
+            f.writelines(labels)
+    else:
+        ext = image_format.lower().replace("jpeg", "jpg")
+        archive = tarfile.open(tmp_path, "w") if format == "tar" else zipfile.ZipFile(tmp_path, "w")
+        with archive:
+            for index in range(start, stop):
+                data, text = render_captcha(
+                    config, seed=sample_seed(seed, index), format=image_format, quality=quality
+                )
+                name = f"{index:09d}.{ext}"
+                _add_member(archive, name, data.getvalue())
+                labels.append(f"{name}\t{text}\n")
+            _add_member(archive, LABELS_FILE, "".join(labels).encode("utf-8"))
+
+    os.replace(tmp_path, path)
+    return shard, stop - start, time.perf_counter() - started
+
+
+def _add_member(archive, name, data):
+    if isinstance(archive, zipfile.ZipFile):
+        # encoded images do not compress any further
+        archive.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+    else:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+
+
+def _prepare(out_dir, settings, config):
+    """Create *out_dir*, or check that the dataset already in it was started with the same *settings*."""
+    os.makedirs(out_dir, exist_ok=True)
+    settings_path = os.path.join(out_dir, SETTINGS_FILE)
+    if os.path.exists(settings_path):
+        with open(settings_path) as f:
+            existing = json.load(f)
+        if existing != settings:
+            raise ValueError(
+                f"{out_dir} holds a dataset generated with different settings; use an empty directory."
+            )
+    else:
+        with open(settings_path + ".tmp", "w") as f:
+            json.dump(settings, f, indent=2)
+        os.replace(settings_path + ".tmp", settings_path)
+
+    array_path = os.path.join(out_dir, ARRAY_FILE)
+    if settings["format"] == "npy" and not os.path.exists(array_path):
+        width, height = config.size
+        # allocated once (sparse on most file systems), the workers fill their slices
+        np.lib.format.open_memmap(
+            array_path + ".tmp.npy", mode="w+", dtype=np.uint8, shape=(settings["count"], height, width, 3)
+        ).flush()
+        os.replace(array_path + ".tmp.npy", array_path)
+
+
+def generate_dataset(
+    out_dir,
+    count,
+    shard_size=10000,
+    format="tar",
+    seed=0,
+    workers=None,
+    captcha_options=None,
+    image_format="JPEG",
+    quality=85,
+):
+    """
+    Write *count* labelled captchas to *out_dir* and yield ``(shard, samples, seconds)`` as shards complete.
+
+    Args:
+        out_dir (str): Output directory; an existing dataset in it is resumed.
+        count (int): Number of captchas.
+        shard_size (int): Captchas per shard (and per task).
+        format (str): "tar", "zip" or "npy".
+        seed (int): Dataset seed.
+        workers (int): Worker processes (default: one per CPU).
+        captcha_options (dict): Keyword arguments for ``CaptchaConfig``.
+        image_format (str): Encoding of the archived images (ignored for npy).
+        quality (int): JPEG/WebP quality of the archived images.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format '{format}'. Choose from {', '.join(FORMATS)}.")
+    if count < 1 or shard_size < 1:
+        raise ValueError("Count and shard size must be positive.")
+    captcha_options = dict(captcha_options or {})
+    config = CaptchaConfig(**captcha_options)
+    settings = {
+        "count": count,
+        "shard_size": shard_size,
+        "format": format,
+        "seed": seed,
+        "captcha_options": json.loads(json.dumps(captcha_options)),
+        "image_format": image_format.upper(),
+        "quality": quality,
+    }
+    _prepare(out_dir, settings, config)
+
+    jobs = []
+    for shard, start in enumerate(range(0, count, shard_size)):
+        if not os.path.exists(_shard_path(out_dir, shard, format)):
+            stop = min(start + shard_size, count)
+            jobs.append((out_dir, shard, start, stop, format, config, seed, image_format, quality))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for future in concurrent.futures.as_completed([executor.submit(_render_shard, job) for job in jobs]):
+            yield future.result()
+
+    if format == "npy":
+        _merge_labels(out_dir, (count + shard_size - 1) // shard_size)
+
+
+def _merge_labels(out_dir, shards):
+    with open(os.path.join(out_dir, LABELS_FILE + ".tmp"), "w") as out:
+        for shard in range(shards):
+            with open(_shard_path(out_dir, shard, "npy")) as f:
+                out.write(f.read())
+    os.replace(os.path.join(out_dir, LABELS_FILE + ".tmp"), os.path.join(out_dir, LABELS_FILE))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a sharded, labelled captcha dataset.")
+    parser.add_argument("out_dir", help="output directory (an unfinished dataset in it is resumed)")
+    parser.add_argument("count", type=int, help="number of captchas")
+    parser.add_argument("--format", choices=FORMATS, default="tar", help="shard format (default: %(default)s)")
+    parser.add_argument("--shard-size", type=int, default=10000, help="captchas per shard (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="dataset seed (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="worker processes (0 = one per CPU)")
+    parser.add_argument("--length", type=int, default=5, help="letters per captcha (default: %(default)s)")
+    parser.add_argument("--size", type=int, nargs=2, default=(200, 100), metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--fontsize", type=int, default=36)
+    parser.add_argument("--use-atlas", action="store_true", help="blit pre-rendered glyphs (faster)")
+    parser.add_argument("--image-format", default="JPEG", help="encoding inside tar/zip shards")
+    parser.add_argument("--quality", type=int, default=85)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = {"length": args.length, "size": list(args.size), "fontsize": args.fontsize, "use_atlas": args.use_atlas}
+    start = time.perf_counter()
+    done = 0
+    for shard, samples, seconds in generate_dataset(
+        args.out_dir, args.count, args.shard_size, args.format, args.seed, args.jobs or None, options,
+        args.image_format, args.quality,
+    ):
+        done += samples
+        print(f"Shard {shard}: {samples} captchas in {seconds:.2f} s")
+    elapsed = time.perf_counter() - start
+    rate = f", {done / elapsed:.0f} images/sec" if done else ""
+    print(f"Generated {done} captchas in {elapsed:.2f} s{rate}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
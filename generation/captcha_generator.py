@@ -1,13 +1,108 @@
+import dataclasses
+import io
+import os
+import pathlib
 import random
 import string
 
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image, ImageDraw
+
+from font_cache import get_font
+from glyph_atlas import get_atlas
+
+# "color": coloured text, dots and lines; "simple": white text, dots, full-width lines and arcs
+STYLES = ("color", "simple")
+# background of SimpleCaptcha without random_bgcolor, per style
+STYLE_BACKGROUNDS = {"color": (255, 255, 255), "simple": 255}
 
 
 class SimpleCaptchaException(Exception):
     pass
 
 
+@dataclasses.dataclass(frozen=True)
+class CaptchaConfig:
+    """
+    Immutable captcha settings. Rendering never modifies a config, so one instance can be shared by any
+    number of threads (and pickled to worker processes).
+
+    *bgcolor* None picks a random background for every captcha. With *use_atlas* the text is blitted from
+    pre-rendered glyphs (see glyph_atlas) instead of being rasterized on every captcha; with several
+    *glyph_angles* each letter gets a randomly rotated variant. *style* is one of ``STYLES``.
+    """
+
+    size: tuple = (200, 100)
+    fontsize: int = 36
+    bgcolor: tuple = (255, 255, 255)
+    length: int = 5
+    font_path: str = "arial.ttf"
+    use_atlas: bool = False
+    glyph_angles: tuple = (0,)
+    style: str = "color"
+
+    def __post_init__(self):
+        if not self.size:
+            raise SimpleCaptchaException("Size must not be empty.")
+        if not self.fontsize:
+            raise SimpleCaptchaException("Font size must be defined.")
+        if self.length < 1:
+            raise SimpleCaptchaException("Length must be at least 1.")
+        if self.style not in STYLES:
+            raise SimpleCaptchaException(f"Style must be one of {', '.join(STYLES)}.")
+        object.__setattr__(self, "size", tuple(self.size))
+        object.__setattr__(self, "glyph_angles", tuple(self.glyph_angles))
+
+
+def render_captcha(config, text=None, seed=None, output="bytes", format=None, quality=85):
+    """
+    Render one captcha for *config* and return ``(data, text)``.
+
+    All randomness comes from generators created for this call from *seed*, so calls are independent of each
+    other and of the global ``random`` state: the same config, text and seed always give the same image, and
+    None gives a fresh captcha. *text* None draws ``config.length`` random letters.
+
+    Nothing touches the disk unless *output* is a path; see ``_export`` for the accepted values.
+    *format* defaults to JPEG in memory and to the file extension for paths.
+    """
+    rng = random.Random(seed)
+    # dot noise is drawn in bulk with NumPy; derive its generator from the same seed
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+
+    if text is None:
+        text = _random_text(config.length, rng)
+    if not text:
+        raise SimpleCaptchaException("Field text must not be empty.")
+    bgcolor = config.bgcolor if config.bgcolor is not None else _random_color(rng)
+
+    try:
+        if config.use_atlas:
+            atlas = get_atlas(config.font_path, config.fontsize, config.glyph_angles)
+        else:
+            font = get_font(config.font_path, config.fontsize)
+    except IOError:
+        raise SimpleCaptchaException(
+            "Font file not found. Please provide a valid path."
+        )
+
+    image = Image.new("RGB", config.size, bgcolor)
+    draw = ImageDraw.Draw(image)
+
+    simple = config.style == "simple"
+    color = "white" if simple else _random_color(rng)
+    if config.use_atlas:
+        atlas.draw_centered(draw, config.size, text, color, rng)
+    else:
+        draw.text(_center_coords(draw, font, text, config.size), text, font=font, fill=color)
+
+    _add_noise_dots(image, np_rng, white=simple)
+    if simple:
+        _add_simple_noise_lines(draw, config.size, rng)
+    else:
+        _add_noise_lines(draw, config.size, rng)
+    return _export(image, output, format, quality), text
+
+
 class SimpleCaptcha:
     def __init__(
         self,
@@ -16,95 +111,143 @@ class SimpleCaptcha:
         fontsize=36,
         random_text=False,
         random_bgcolor=False,
+        seed=None,
+        use_atlas=False,
+        glyph_angles=(0,),
+        style="color",
     ):
-        self.size = size
-        self.text = "CAPTCHA"
-        self.fontsize = fontsize
-        self.bgcolor = (255, 255, 255)
-        self.length = length
-        self.image = None
-
-        if random_text:
-            self.text = self._random_text()
-
-        if not self.text:
-            raise SimpleCaptchaException("Field text must not be empty.")
-
-        if not self.size:
-            raise SimpleCaptchaException("Size must not be empty.")
-
-        if not self.fontsize:
-            raise SimpleCaptchaException("Font size must be defined.")
-
-        if random_bgcolor:
-            self.bgcolor = self._random_color()
-
-    def _center_coords(self, draw, font):
-        # Use `textbbox` instead of `textsize` to get the bounding box of the text
-        text_bbox = draw.textbbox((0, 0), self.text, font=font)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
-        xy = ((self.size[0] - text_width) / 2, (self.size[1] - text_height) / 2)
-        return xy
-
-    def _add_noise_dots(self, draw):
-        for _ in range(int(self.size[0] * self.size[1] * 0.1)):
-            x = random.randint(0, self.size[0] - 1)
-            y = random.randint(0, self.size[1] - 1)
-            draw.point((x, y), fill=self._random_color())
-        return draw
-
-    def _add_noise_lines(self, draw):
-        for _ in range(8):
-            width = random.randint(1, 2)
-            start = (
-                random.randint(0, self.size[0] - 1),
-                random.randint(0, self.size[1] - 1),
-            )
-            end = (
-                random.randint(0, self.size[0] - 1),
-                random.randint(0, self.size[1] - 1),
+        """
+        Captcha generator with fixed settings, safe to share between threads.
+
+        The text and background colour are chosen here, once. *seed* makes ``get_captcha`` reproducible:
+        with a seed every call renders the same image, without one every call gets fresh noise.
+        """
+        rng = random.Random(seed)
+        self.text = _random_text(length, rng) if random_text else "CAPTCHA"
+        self.seed = seed
+        self.config = CaptchaConfig(
+            size=size,
+            fontsize=fontsize,
+            bgcolor=_random_color(rng) if random_bgcolor else STYLE_BACKGROUNDS[style],
+            length=length,
+            use_atlas=use_atlas,
+            glyph_angles=glyph_angles,
+            style=style,
+        )
+
+    def get_captcha(self, size=None, text=None, bgcolor=None, output="bytes", format=None, quality=85, seed=None):
+        """
+        Render a captcha and return ``(data, text)``; see ``render_captcha``.
+
+        *size*, *text*, *bgcolor* and *seed* override the instance settings for this call only.
+        """
+        config = self.config
+        if size is not None or bgcolor is not None:
+            config = dataclasses.replace(
+                config,
+                size=config.size if size is None else size,
+                bgcolor=config.bgcolor if bgcolor is None else bgcolor,
             )
-            draw.line([start, end], fill=self._random_color(), width=width)
-        return draw
-
-    def get_captcha(self, size=None, text=None, bgcolor=None):
-        if text is not None:
-            self.text = text
-        if size is not None:
-            self.size = size
-        if bgcolor is not None:
-            self.bgcolor = bgcolor
-
-        self.image = Image.new("RGB", self.size, self.bgcolor)
-
-        try:
-            font = ImageFont.truetype("arial.ttf", self.fontsize)
-        except IOError:
-            raise SimpleCaptchaException(
-                "Font file not found. Please provide a valid path."
-            )
-
-        draw = ImageDraw.Draw(self.image)
-
-        xy = self._center_coords(draw, font)
-        draw.text(xy, self.text, font=font, fill=self._random_color())
-
-        self._add_noise_dots(draw)
-        self._add_noise_lines(draw)
-        self.image.save("captcha.jpg")
-        return self.image, self.text
-
-    def _random_text(self):
-        letters = string.ascii_letters
-        return "".join(random.choices(letters, k=self.length))
-
-    def _random_color(self):
-        return tuple(random.randint(0, 255) for _ in range(3))
+        return render_captcha(
+            config,
+            self.text if text is None else text,
+            self.seed if seed is None else seed,
+            output,
+            format,
+            quality,
+        )
+
+
+def _center_coords(draw, font, text, size):
+    # Use `textbbox` instead of `textsize` to get the bounding box of the text
+    text_bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    xy = ((size[0] - text_width) / 2, (size[1] - text_height) / 2)
+    return xy
+
+
+def _add_noise_dots(image, np_rng, white=False):
+    # draw all dots at once: random coordinates and colours scattered into the pixel array
+    width, height = image.size
+    count = int(width * height * 0.1)
+    pixels = np.array(image)
+    ys = np_rng.integers(0, height, count)
+    xs = np_rng.integers(0, width, count)
+    pixels[ys, xs] = 255 if white else np_rng.integers(0, 256, (count, 3), dtype=np.uint8)
+    image.paste(Image.fromarray(pixels))
+
+
+def _add_noise_lines(draw, size, rng):
+    for _ in range(8):
+        width = rng.randint(1, 2)
+        start = (
+            rng.randint(0, size[0] - 1),
+            rng.randint(0, size[1] - 1),
+        )
+        end = (
+            rng.randint(0, size[0] - 1),
+            rng.randint(0, size[1] - 1),
+        )
+        draw.line([start, end], fill=_random_color(rng), width=width)
+
+
+def _add_simple_noise_lines(draw, size, rng):
+    for _ in range(8):
+        width = rng.randint(1, 2)
+        start = (0, rng.randint(0, size[1] - 1))
+        end = (size[0], rng.randint(0, size[1] - 1))
+        draw.line([start, end], fill="white", width=width)
+    for _ in range(8):
+        start = (-50, -50)
+        end = (size[0] + 10, rng.randint(0, size[1] + 10))
+        draw.arc(start + end, 0, 360, fill="white")
+
+
+def _export(image, output, format, quality):
+    """
+    Hand *image* over as requested by *output*:
+
+    "bytes" -> encoded ``io.BytesIO`` (rewound), "raw" -> raw RGB pixel buffer (``bytes``),
+    "image" -> the PIL image, a path -> encoded file (the path is returned),
+    any object with ``write`` -> encoded into it (the object is returned).
+    """
+    if output == "image":
+        return image
+    if output == "raw":
+        return image.tobytes()
+
+    if output == "bytes":
+        target = io.BytesIO()
+    elif hasattr(output, "write") or isinstance(output, (str, os.PathLike)):
+        target = output
+    else:
+        raise SimpleCaptchaException(
+            "Output must be 'bytes', 'raw', 'image', a file path or a writable file object."
+        )
+
+    if format is None and not hasattr(target, "write"):
+        format = Image.registered_extensions().get(pathlib.Path(target).suffix.lower())
+    format = (format or "JPEG").upper()
+    options = {"quality": quality} if format in ("JPEG", "WEBP") else {}
+    image.save(target, format=format, **options)
+
+    if output == "bytes":
+        target.seek(0)
+    return target
+
+
+def _random_text(length, rng):
+    letters = string.ascii_letters
+    return "".join(rng.choices(letters, k=length))
+
+
+def _random_color(rng):
+    return tuple(rng.randint(0, 255) for _ in range(3))
 
 
 if __name__ == "__main__":
     sc = SimpleCaptcha(length=7, fontsize=36, random_text=True, random_bgcolor=True)
-    image, text = sc.get_captcha()
+    image, text = sc.get_captcha(output="image")
     print(f"Generated CAPTCHA text: {text}")
     image.show()
@@ -0,0 +1,192 @@
+"""
+Pool of pre-rendered captchas served from memory.
+
+Rendering happens in background workers (threads or processes) that keep a bounded ring buffer of
+``(image bytes, text hash)`` pairs topped up: when the depth drops below the low watermark the buffer is
+refilled up to the high watermark. Requests pop from the buffer, so a login burst is answered without
+rendering; only when the buffer runs dry is a captcha rendered on demand. A failing refill (say, a missing
+font) is logged and retried with exponential backoff; meanwhile requests are rendered on demand.
+
+Answers are stored as HMAC-SHA256 hashes keyed with the pool's secret, a random key per pool unless one is
+passed (pools behind a load balancer that verify each other's captchas need a shared one).
+
+    async with CaptchaPool(capacity=2048, captcha_options={"length": 6}) as pool:
+        image_bytes, text_hash = await pool.get()
+        ...
+        pool.verify(answer, text_hash)
+"""
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import hmac
+import logging
+import os
+import time
+
+from captcha_generator import CaptchaConfig, render_captcha
+
+logger = logging.getLogger(__name__)
+
+REFILL_BACKOFF = 0.1  # seconds after the first failed refill, doubled on every further failure
+MAX_REFILL_BACKOFF = 30.0
+
+
+def hash_text(text, secret):
+    """Keyed hash of a captcha answer, so the solution itself never has to be stored."""
+    return hmac.new(secret, text.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def render_entry(config, secret):
+    """Render one captcha and return ``(image bytes, text hash)``. Module level so process pools can pickle it."""
+    data, text = render_captcha(config)
+    return data.getvalue(), hash_text(text, secret)
+
+
+class CaptchaPool:
+    def __init__(
+        self,
+        capacity=1024,
+        low_watermark=None,
+        high_watermark=None,
+        workers=4,
+        executor="thread",
+        captcha_options=None,
+        secret=None,
+    ):
+        """
+        Args:
+            capacity (int): Size of the ring buffer.
+            low_watermark (int): Start refilling below this depth (default: a quarter of *capacity*).
+            high_watermark (int): Refill up to this depth (default: *capacity*).
+            workers (int): Number of render threads or processes.
+            executor (str): "thread" or "process".
+            captcha_options (dict): Keyword arguments for ``CaptchaConfig``.
+            secret (bytes): Key for the answer hashes (default: 32 random bytes, generated per pool).
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError("Executor must be 'thread' or 'process'.")
+        self.capacity = capacity
+        self.low_watermark = capacity // 4 if low_watermark is None else low_watermark
+        self.high_watermark = capacity if high_watermark is None else min(high_watermark, capacity)
+        if not 0 <= self.low_watermark <= self.high_watermark:
+            raise ValueError("Watermarks must satisfy 0 <= low <= high <= capacity.")
+        self.workers = workers
+        self.executor_kind = executor
+        # one immutable config shared by every render, whichever worker runs it
+        self.config = CaptchaConfig(**(captcha_options or {}))
+        self.secret = os.urandom(32) if secret is None else secret
+        if not self.secret:
+            raise ValueError("Secret must not be empty.")
+
+        self._buffer = collections.deque(maxlen=capacity)
+        self._executor = None
+        self._refill_task = None
+        self._refill_needed = None
+        self._served = 0
+        self._misses = 0
+        self._refilled = 0
+        self._refill_seconds = 0.0
+        self._refill_errors = 0
+
+    async def start(self):
+        if self._executor is not None:
+            return
+        if self.executor_kind == "process":
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        self._refill_needed = asyncio.Event()
+        self._refill_needed.set()
+        self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def close(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _render(self):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, render_entry, self.config, self.secret)
+
+    async def _refill_loop(self):
+        backoff = REFILL_BACKOFF
+        while True:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+
+            while len(self._buffer) < self.high_watermark:
+                # keep every worker busy, but do not overshoot the high watermark
+                batch = min(self.workers * 2, self.high_watermark - len(self._buffer))
+                start = time.perf_counter()
+                results = await asyncio.gather(*(self._render() for _ in range(batch)), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, Exception)]
+                for entry in results:
+                    if not isinstance(entry, BaseException):
+                        self._buffer.append(entry)
+                self._refilled += batch - len(errors)
+                self._refill_seconds += time.perf_counter() - start
+                if not errors:
+                    backoff = REFILL_BACKOFF
+                    continue
+
+                self._refill_errors += len(errors)
+                logger.error("Captcha refill failed for %d of %d renders, retrying in %.1f s",
+                             len(errors), batch, backoff, exc_info=errors[0])
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_REFILL_BACKOFF)
+
+    async def get(self):
+        """Return ``(image bytes, text hash)``, from the buffer when possible."""
+        if self._executor is None:
+            raise RuntimeError("CaptchaPool is not started.")
+        try:
+            entry = self._buffer.popleft()
+        except IndexError:
+            self._misses += 1
+            entry = await self._render()
+        self._served += 1
+        if len(self._buffer) < self.low_watermark:
+            self._refill_needed.set()
+        return entry
+
+    def verify(self, answer, text_hash):
+        return hmac.compare_digest(hash_text(answer, self.secret), text_hash)
+
+    def metrics(self):
+        return {
+            "depth": len(self._buffer),
+            "capacity": self.capacity,
+            "served": self._served,
+            "misses": self._misses,
+            "refilled": self._refilled,
+            "refill_rate": round(self._refilled / self._refill_seconds, 1) if self._refill_seconds else 0.0,
+            "refill_errors": self._refill_errors,
+        }
+
+
+if __name__ == "__main__":
+    async def demo():
+        async with CaptchaPool(capacity=256, captcha_options={"use_atlas": True}) as pool:
+            await asyncio.sleep(1)
+            start = time.perf_counter()
+            for _ in range(200):
+                await pool.get()
+            print(f"200 captchas served in {(time.perf_counter() - start) * 1e3:.2f} ms")
+            print(pool.metrics())
+
+    asyncio.run(demo())
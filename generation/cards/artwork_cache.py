@@ -0,0 +1,172 @@
+"""
+Cache of decoded, fitted artwork for card rendering.
+
+Entries are keyed by (path, mtime, target box, fit, resample), so an edited file or a different slot size is
+a new entry, and held under a byte budget with least-recently-used eviction. A cache is an image loader for
+``card_layout.render`` and ``CardGenerator.render_card``:
+
+    cache = ArtworkCache(max_bytes=128 * 2**20)
+    for generator in generators:
+        generator.render_card(cache)
+    print(cache.stats())
+
+Across a process pool every worker would otherwise decode the same pictures into its own cache. The parent
+can ``share`` the artwork it knows about up front: each picture is decoded once into a shared-memory
+segment. Only the segment names (``shared_entries``) go to the workers, whose caches ``use_shared`` them and
+map the pixels read-only instead of holding copies. The parent owns the segments and removes them in
+``close``.
+"""
+import collections
+import os
+import threading
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+from card_layout import fit_image
+
+
+class ArtworkCache:
+    def __init__(self, max_bytes=256 * 2**20, resample=Image.BICUBIC):
+        """
+        Args:
+            max_bytes (int): Budget for the decoded pixels held by this process (shared entries do not count).
+            resample (int): Default resample filter for fitting.
+        """
+        self.max_bytes = max_bytes
+        self.resample = resample
+        self._entries = collections.OrderedDict()  # key -> (image, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._shared = {}  # key -> (segment name, width, height)
+        self._owned = []  # segments created by this process
+        self._attached = {}  # segment name -> SharedMemory mapped by this process
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def key(path, size, fit="contain", resample=Image.BICUBIC):
+        """Cache key of *path* fitted into *size*; None if the file does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_mtime_ns, tuple(size), fit, resample
+
+    def get(self, path, size, fit="contain", resample=None):
+        """Return *path* decoded as RGB and fitted into *size* (see ``card_layout.fit_image``); None if missing."""
+        resample = self.resample if resample is None else resample
+        key = self.key(path, size, fit, resample)
+        if key is None:
+            print(f"Image not found at {path}. Skipping image addition.")
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            shared = self._shared.get(key)
+        if shared is not None:
+            image = self._attach(*shared)
+            with self._lock:
+                self.hits += 1
+                # a view of the shared segment costs no budget
+                self._entries[key] = (image, 0)
+            return image
+
+        image = self._decode(key)
+        with self._lock:
+            self.misses += 1
+            self._store(key, image, image.width * image.height * len(image.getbands()))
+        return image
+
+    __call__ = get
+
+    @staticmethod
+    def _decode(key):
+        path, _, size, fit, resample = key
+        with Image.open(path) as img:
+            return fit_image(img.convert("RGB"), size, fit, resample)
+
+    def _store(self, key, image, nbytes):
+        if key in self._entries or nbytes > self.max_bytes:
+            return
+        self._entries[key] = (image, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+            self.evictions += 1
+
+    def share(self, path, size, fit="contain", resample=None):
+        """
+        Decode *path* into a shared-memory segment that pickled copies of this cache map instead of decoding.
+
+        Returns the key, or None if the file does not exist. Call ``close`` to remove the segments.
+        """
+        resample = self.resample if resample is None else resample
+        key = self.key(path, size, fit, resample)
+        if key is None or key in self._shared:
+            return key
+        image = self._decode(key).convert("RGBX")  # 4 bytes per pixel can be mapped without a copy
+        segment = shared_memory.SharedMemory(create=True, size=image.width * image.height * 4)
+        segment.buf[:] = image.tobytes()
+        self._owned.append(segment)
+        self._shared[key] = (segment.name, image.width, image.height)
+        return key
+
+    def _attach(self, name, width, height):
+        segment = self._attached.get(name)
+        if segment is None:
+            segment = next((owned for owned in self._owned if owned.name == name), None)
+            segment = segment or shared_memory.SharedMemory(name=name)
+            self._attached[name] = segment
+        return Image.frombuffer("RGBX", (width, height), segment.buf, "raw", "RGBX", 0, 1)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "shared": len(self._shared),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def close(self):
+        """Drop all entries, unmap shared artwork and remove the segments this process created."""
+        self.clear()
+        attached, self._attached = self._attached, {}
+        for segment in attached.values():
+            if segment not in self._owned:
+                segment.close()
+        for segment in self._owned:
+            try:
+                segment.close()
+            except BufferError:
+                pass  # an image still maps it; the memory is released once that image is gone
+            segment.unlink()
+        self._owned = []
+        self._shared = {}
+
+    def shared_entries(self):
+        """Names of the shared segments, to hand to worker processes (small and picklable)."""
+        return dict(self._shared)
+
+    def use_shared(self, entries):
+        """Map the artwork in *entries* (from ``shared_entries`` of the owning cache) instead of decoding it."""
+        self._shared.update(entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
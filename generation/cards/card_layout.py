@@ -0,0 +1,267 @@
+"""
+Declarative card layouts.
+
+A layout is a plain dict (so it can live in JSON) describing the card size, defaults and a list of layers:
+
+    layout = {
+        "size": (756, 1051),
+        "background": (0, 0, 0),
+        "font": "../../fonts/Lato-Bold.ttf",
+        "color": (255, 255, 255),
+        "layers": [
+            {"type": "image", "field": "image_path", "box": (0, 0, 1, 0.4), "valign": "top"},
+            {"type": "text", "field": "title_text", "box": (0, 0.4, 1, 0.2), "size": 48},
+            {"type": "text", "field": "content_text", "box": (0, 0.7, 1, 0.25), "size": 32,
+             "wrap": True, "valign": "top", "padding": 10},
+            {"type": "text", "text": "Legendary", "box": (0, 0, 1, 1), "size": 20, "align": "left",
+             "valign": "bottom", "padding": 10},
+        ],
+    }
+
+Boxes are ``(left, top, width, height)`` as fractions of the card size, shrunk by ``padding`` pixels. A layer
+either has a fixed ``text``/``path`` or names the ``field`` of the per-card data it shows. Layers:
+
+    rect    fill, outline, width
+    image   field | path, fit ("contain": shrink to fit, keeping the aspect ratio; "stretch"), align, valign
+    text    field | text, font, size, min_size, color, align, valign, wrap, line_spacing
+
+``compile_layout`` validates a layout once and turns it into a ``RenderPlan`` of pixel boxes, resolved
+fonts and colours. A plan holds only tuples, numbers and strings: it pickles small and is hashable, so
+worker processes get it once and only the per-card data travels with every card. Layers that do not depend
+on card data are drawn once per plan into a cached base image, unless they overlap a layer below them that
+has to be drawn per card (a layer is taken to stay within its box).
+
+Text is laid out by text_layout. With ``min_size`` it is shrunk from ``size`` (but not below ``min_size``)
+until it fits its box; layouts are memoized, so recurring text is shaped only once.
+
+    plan = compile_layout(layout)
+    card = render(plan, {"title_text": "Dragon", "content_text": "...", "image_path": "dragon.jpg"})
+"""
+import collections
+import functools
+import numbers
+import pathlib
+
+from PIL import Image, ImageColor, ImageDraw
+
+from text_layout import layout_paragraph, load_font
+
+ALIGN = ("left", "center", "right")
+VALIGN = ("top", "middle", "bottom")
+FIT = ("contain", "stretch")
+
+_COMMON_KEYS = {"type", "box", "padding"}
+_LAYER_KEYS = {
+    "rect": _COMMON_KEYS | {"fill", "outline", "width"},
+    "image": _COMMON_KEYS | {"field", "path", "fit", "align", "valign"},
+    "text": _COMMON_KEYS | {
+        "field", "text", "font", "size", "min_size", "color", "align", "valign", "wrap", "line_spacing",
+    },
+}
+_LAYOUT_KEYS = {"size", "background", "font", "color", "layers"}
+
+Layer = collections.namedtuple(
+    "Layer",
+    ["kind", "box", "field", "value", "font", "size", "color", "align", "valign", "wrap", "fit", "line_spacing",
+     "outline", "width", "min_size"],
+    defaults=(None, None, None, None, None, "center", "middle", False, "contain", 1.0, None, 1, None),
+)
+RenderPlan = collections.namedtuple("RenderPlan", ["size", "background", "base_layers", "card_layers"])
+
+
+def _check(condition, where, message):
+    if not condition:
+        raise ValueError(f"Invalid card layout: {where}: {message}")
+
+
+def _color(value, where):
+    if isinstance(value, str):
+        try:
+            return ImageColor.getrgb(value)
+        except ValueError:
+            _check(False, where, f"unknown colour '{value}'")
+    _check(
+        isinstance(value, (tuple, list)) and len(value) in (3, 4)
+        and all(isinstance(channel, int) and 0 <= channel <= 255 for channel in value),
+        where, "expected a colour name or 3-4 channel values 0-255",
+    )
+    return tuple(value)
+
+
+def _pixel_box(layer, size, where):
+    box = layer.get("box", (0, 0, 1, 1))
+    _check(
+        isinstance(box, (tuple, list)) and len(box) == 4 and all(isinstance(v, numbers.Real) for v in box),
+        where, "box must be (left, top, width, height) fractions",
+    )
+    left, top, width, height = box
+    _check(0 <= left <= 1 and 0 <= top <= 1 and 0 < width and 0 < height
+           and left + width <= 1.000001 and top + height <= 1.000001, where, "box must lie within the card")
+    padding = layer.get("padding", 0)
+    _check(isinstance(padding, numbers.Real) and padding >= 0, where, "padding must be a non-negative number")
+    box = (
+        round(left * size[0] + padding),
+        round(top * size[1] + padding),
+        round((left + width) * size[0] - padding),
+        round((top + height) * size[1] - padding),
+    )
+    _check(box[0] < box[2] and box[1] < box[3], where, "padding leaves no room in the box")
+    return box
+
+
+def _compile_layer(layer, index, layout, size):
+    where = f"layers[{index}]"
+    _check(isinstance(layer, dict), where, "expected a dict")
+    kind = layer.get("type")
+    _check(kind in _LAYER_KEYS, where, f"type must be one of {', '.join(_LAYER_KEYS)}")
+    unknown = set(layer) - _LAYER_KEYS[kind]
+    _check(not unknown, where, f"unknown keys {', '.join(sorted(unknown))}")
+    box = _pixel_box(layer, size, where)
+
+    if kind == "rect":
+        return Layer(
+            kind, box,
+            color=_color(layer["fill"], where) if "fill" in layer else None,
+            outline=_color(layer["outline"], where) if "outline" in layer else None,
+            width=layer.get("width", 1),
+        )
+
+    value_key = "path" if kind == "image" else "text"
+    _check(("field" in layer) != (value_key in layer), where, f"needs exactly one of 'field' and '{value_key}'")
+    _check("field" not in layer or isinstance(layer["field"], str), where, "field must be a string")
+    align = layer.get("align", "center")
+    valign = layer.get("valign", "middle")
+    _check(align in ALIGN, where, f"align must be one of {', '.join(ALIGN)}")
+    _check(valign in VALIGN, where, f"valign must be one of {', '.join(VALIGN)}")
+
+    if kind == "image":
+        fit = layer.get("fit", "contain")
+        _check(fit in FIT, where, f"fit must be one of {', '.join(FIT)}")
+        return Layer(kind, box, layer.get("field"), layer.get("path"), align=align, valign=valign, fit=fit)
+
+    font = layer.get("font", layout.get("font"))
+    _check(font is not None, where, "no font given for the layer or the layout")
+    font_size = layer.get("size", 32)
+    _check(isinstance(font_size, int) and font_size > 0, where, "size must be a positive integer")
+    min_size = layer.get("min_size")
+    _check(min_size is None or isinstance(min_size, int) and 0 < min_size <= font_size, where,
+           "min_size must be a positive integer no larger than size")
+    line_spacing = layer.get("line_spacing", 1.0)
+    _check(isinstance(line_spacing, numbers.Real) and line_spacing > 0, where, "line_spacing must be positive")
+    return Layer(
+        kind, box, layer.get("field"), layer.get("text"), str(font), font_size,
+        _color(layer.get("color", layout.get("color", (255, 255, 255))), where),
+        align, valign, bool(layer.get("wrap", False)), line_spacing=float(line_spacing), min_size=min_size,
+    )
+
+
+def compile_layout(layout):
+    """Validate *layout* and return its ``RenderPlan``; raises ValueError naming the offending entry."""
+    _check(isinstance(layout, dict), "layout", "expected a dict")
+    unknown = set(layout) - _LAYOUT_KEYS
+    _check(not unknown, "layout", f"unknown keys {', '.join(sorted(unknown))}")
+    size = layout.get("size")
+    _check(isinstance(size, (tuple, list)) and len(size) == 2 and all(isinstance(v, int) and v > 0 for v in size),
+           "size", "expected (width, height) in pixels")
+    size = tuple(size)
+    layers = layout.get("layers", [])
+    _check(isinstance(layers, (tuple, list)), "layers", "expected a list")
+    compiled = [_compile_layer(layer, index, layout, size) for index, layer in enumerate(layers)]
+
+    return make_plan(size, _color(layout.get("background", (0, 0, 0)), "background"), compiled)
+
+
+def make_plan(size, background, layers):
+    """
+    ``RenderPlan`` of *layers* (bottom to top) on a *size* card filled with *background*.
+
+    A static layer moves into the base image unless something drawn per card lies beneath it.
+    """
+    base_layers = []
+    card_layers = []
+    for layer in layers:
+        if layer.field is None and not any(_overlaps(layer.box, below.box) for below in card_layers):
+            base_layers.append(layer)
+        else:
+            card_layers.append(layer)
+    return RenderPlan(tuple(size), tuple(background), tuple(base_layers), tuple(card_layers))
+
+
+def _overlaps(box, other):
+    return box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]
+
+
+def fit_image(img, size, fit="contain", resample=Image.BICUBIC):
+    """Fit *img* into *size*: "contain" shrinks it (never enlarges) keeping the aspect ratio, "stretch" fills it."""
+    if fit == "stretch":
+        return img.resize(size, resample)
+    scale = min(size[0] / img.width, size[1] / img.height, 1.0)
+    if scale == 1.0:
+        return img
+    return img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), resample)
+
+
+def load_image(path, size, fit="contain"):
+    """Default image loader of ``render``: open *path* as RGB and fit it into *size*; None if it is missing."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        print(f"Image not found at {path}. Skipping image addition.")
+        return None
+    with Image.open(path) as img:
+        return fit_image(img.convert("RGB"), size, fit)
+
+
+def _aligned(box, size, align, valign):
+    left, top, right, bottom = box
+    x = {"left": left, "center": left + (right - left - size[0]) // 2, "right": right - size[0]}[align]
+    y = {"top": top, "middle": top + (bottom - top - size[1]) // 2, "bottom": bottom - size[1]}[valign]
+    return x, y
+
+
+def _draw_layer(img, draw, layer, value, image_loader):
+    left, top, right, bottom = layer.box
+    if layer.kind == "rect":
+        draw.rectangle(layer.box, fill=layer.color, outline=layer.outline, width=layer.width)
+        return
+
+    if layer.kind == "image":
+        picture = image_loader(value, (right - left, bottom - top), layer.fit)
+        if picture is not None:
+            img.paste(picture, _aligned(layer.box, picture.size, layer.align, layer.valign))
+        return
+
+    paragraph = layout_paragraph(str(value), layer.font, layer.size, right - left, bottom - top, layer.min_size,
+                                 layer.wrap, layer.line_spacing)
+    font = load_font(layer.font, paragraph.size)
+    _, y = _aligned(layer.box, (0, paragraph.height), "left", layer.valign)
+    for line, width in zip(paragraph.lines, paragraph.widths):
+        x, _ = _aligned(layer.box, (round(width), 0), layer.align, "top")
+        draw.text((x, y), line, font=font, fill=layer.color)
+        y += paragraph.line_height
+
+
+@functools.lru_cache(maxsize=32)
+def _base_image(size, background, layers):
+    img = Image.new("RGB", size, background)
+    draw = ImageDraw.Draw(img)
+    for layer in layers:
+        _draw_layer(img, draw, layer, layer.value, load_image)
+    return img
+
+
+def render(plan, data=None, image_loader=load_image):
+    """
+    Draw one card of *plan* with the per-card *data* (field name -> text or image path) and return it.
+
+    Layers whose field is missing or empty in *data* are skipped. *image_loader(path, size, fit)* returns
+    the fitted picture for an image layer (or None); pass a caching loader when cards share artwork.
+    """
+    data = data or {}
+    img = _base_image(plan.size, plan.background, plan.base_layers).copy()
+    draw = ImageDraw.Draw(img)
+    for layer in plan.card_layers:
+        value = data.get(layer.field) if layer.field else layer.value
+        if value is None or value == "":
+            continue
+        _draw_layer(img, draw, layer, value, image_loader)
+    return img
@@ -0,0 +1,339 @@
+"""
+Render whole decks of cards from a CSV or JSON spec.
+
+Every spec is a dict of ``CardGenerator`` keyword arguments plus an optional ``output`` file name. Specs are
+turned into a compiled layout (see card_layout) and the card's own field values, and only those are sent to
+the workers. Cards are sorted by their artwork and handed to a process pool in chunks, so cards that share
+art land in the same worker, which decodes and fits each picture once and reuses it (fonts are shared
+through font_cache).
+Every card reports how long it took to render and to save. With ``--pdf`` the cards are imposed onto print
+sheets streamed into one PDF instead of being written as separate images. With ``--encoders N`` the PNG/JPEG
+encoding moves out of the render workers into its own pool (see card_encoder), and ``--encode-preset``
+picks the encoder settings.
+
+    python deck_renderer.py deck.csv out/ --jobs 0 --font-path ../../fonts/Lato-Bold.ttf
+"""
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import functools
+import json
+import os
+import pathlib
+import sys
+import time
+
+from artwork_cache import ArtworkCache
+from card_encoder import PRESETS, CardEncoder, encode_card
+from card_layout import render
+from imposition import PAPER_SIZES_CM, impose
+from oo_card_generator_complete import CardGenerator
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from parallel import chunked, imap_bounded  # noqa: E402
+
+CardResult = collections.namedtuple(
+    "CardResult", ["index", "output", "render_seconds", "save_seconds", "error", "artwork_hit"],
+    defaults=(None, False),
+)
+RenderedCard = collections.namedtuple("RenderedCard", ["result", "image", "dpi", "quality", "preset"])
+
+ARTWORK_BYTES = 256 * 2**20
+# per worker process, see _init_worker
+_artwork = ArtworkCache(ARTWORK_BYTES)
+
+
+def _coerce(value):
+    """Turn a CSV cell into the value CardGenerator expects: numbers, booleans, colour tuples or text."""
+    value = value.strip()
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    parts = value.split(",")
+    if len(parts) in (3, 4):
+        try:
+            return tuple(int(part) for part in parts)
+        except ValueError:
+            pass
+    return value
+
+
+def load_specs(path):
+    """Read card specs from a JSON list of objects or a CSV file with one card per row (empty cells are skipped)."""
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path) as f:
+            specs = json.load(f)
+        if not isinstance(specs, list):
+            raise ValueError(f"{path} must contain a list of card specs.")
+        return specs
+    with open(path, newline="") as f:
+        return [
+            {key: _coerce(value) for key, value in row.items() if value is not None and value.strip()}
+            for row in csv.DictReader(f)
+        ]
+
+
+def _init_worker(max_bytes, shared_entries):
+    global _artwork
+    _artwork = ArtworkCache(max_bytes)
+    _artwork.use_shared(shared_entries)
+
+
+def _artwork_requests(card):
+    """``(path, size, fit)`` of every picture a prepared card shows."""
+    _, plan, data, *_ = card
+    if plan is None:
+        return
+    for layer in plan.card_layers:
+        if layer.kind == "image" and data.get(layer.field):
+            yield data[layer.field], (layer.box[2] - layer.box[0], layer.box[3] - layer.box[1]), layer.fit
+
+
+@contextlib.contextmanager
+def _pool(workers, cards=(), share_artwork=False, artwork_bytes=ARTWORK_BYTES):
+    """
+    Process pool whose workers cache artwork under *artwork_bytes* each; with *share_artwork* the
+    pictures of *cards* are decoded once, here, into shared memory that every worker maps.
+    """
+    with ArtworkCache(artwork_bytes) as shared:
+        if share_artwork:
+            for card in cards:
+                for request in _artwork_requests(card):
+                    shared.share(*request)
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(artwork_bytes, shared.shared_entries())
+        ) as executor:
+            yield executor
+
+
+def _prepare(index, spec, output, plans):
+    """
+    Turn a spec into the small tuple shipped to the workers:
+    ``(index, plan, data, output, dpi, quality, encode_preset, error)``.
+
+    Equal plans are replaced by one shared instance from *plans*, so a chunk pickles each layout only once.
+    """
+    try:
+        generator = CardGenerator(**spec)
+        plan = plans.setdefault(generator.plan, generator.plan)
+    except Exception as ex:
+        return index, None, None, output, None, None, None, str(ex)
+    return (index, plan, generator.card_data(), output, generator.dpi, generator.quality, generator.encode_preset,
+            None)
+
+
+def _output(out_dir, index, spec):
+    """Pop the spec's output name and return its path in *out_dir* (None without a directory)."""
+    name = spec.pop("output", f"card_{index:05d}.png")
+    return os.path.join(out_dir, name) if out_dir else None
+
+
+def _render_chunk(job, save=True):
+    """
+    Pool worker: render the prepared cards of *job*, one ``CardResult`` per card.
+
+    With *save* each card is encoded to its output here, otherwise ``RenderedCard`` tuples are returned.
+    """
+    results = []
+    for index, plan, data, output, dpi, quality, preset, error in job:
+        start = time.perf_counter()
+        image = None
+        hits = _artwork.hits
+        try:
+            if error:
+                raise ValueError(error)
+            image = render(plan, data, _artwork)
+            rendered = time.perf_counter()
+            if save:
+                encode_card(image, output, dpi, quality, preset)
+        except Exception as ex:
+            result = CardResult(index, output, time.perf_counter() - start, 0.0, str(ex))
+        else:
+            result = CardResult(index, output, rendered - start, time.perf_counter() - rendered, None,
+                                _artwork.hits > hits)
+        results.append(result if save else RenderedCard(result, image, dpi, quality, preset))
+    return results
+
+
+def render_deck(specs, out_dir, workers=None, chunk_size=32, defaults=None, share_artwork=False,
+                artwork_bytes=ARTWORK_BYTES, encoders=0):
+    """
+    Render every card spec into *out_dir* and yield a ``CardResult`` per card as it is written.
+
+    Args:
+        specs (iterable): Dicts of ``CardGenerator`` arguments, optionally with an ``output`` file name
+            (default: ``card_<index>.png``).
+        out_dir (str): Output directory.
+        workers (int): Worker processes (default: one per CPU).
+        chunk_size (int): Cards per task.
+        defaults (dict): Arguments applied to every card unless its spec overrides them.
+        share_artwork (bool): Decode every picture once in this process into shared memory for the workers.
+        artwork_bytes (int): Artwork cache budget of each worker.
+        encoders (int): With 0 each render worker also encodes its cards. Otherwise rendered cards are handed
+            to that many encoder processes (see card_encoder), so rendering and encoding overlap.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if encoders:
+        yield from _encode_stage(
+            iter_cards(specs, workers, chunk_size, defaults, None, share_artwork, artwork_bytes, out_dir),
+            encoders,
+        )
+        return
+
+    plans = {}
+    cards = []
+    for index, spec in enumerate(specs):
+        spec = {**(defaults or {}), **spec}
+        cards.append(_prepare(index, spec, _output(out_dir, index, spec), plans))
+
+    # neighbours share artwork, so each picture is decoded by as few workers as possible
+    cards.sort(key=lambda card: str((card[2] or {}).get("image_path") or ""))
+    chunks = [cards[i:i + chunk_size] for i in range(0, len(cards), chunk_size)]
+
+    with _pool(workers, cards, share_artwork, artwork_bytes) as executor:
+        for future in concurrent.futures.as_completed([executor.submit(_render_chunk, chunk) for chunk in chunks]):
+            yield from future.result()
+
+
+def _encode_stage(rendered, encoders):
+    """Encode ``RenderedCard``s in a ``CardEncoder`` while more are rendered; yield the finished results."""
+
+    def finish(result, future):
+        try:
+            _, seconds = future.result()
+        except Exception as ex:
+            return result._replace(error=str(ex))
+        return result._replace(save_seconds=seconds)
+
+    pending = collections.deque()
+    with CardEncoder(encoders) as encoder:
+        for card in rendered:
+            if card.result.error:
+                yield card.result
+                continue
+            pending.append((card.result, encoder.submit(card.image, card.result.output, card.dpi, card.quality,
+                                                        card.preset)))
+            while pending and pending[0][1].done():
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+
+
+def iter_cards(specs, workers=None, chunk_size=32, defaults=None, max_pending=None, share_artwork=False,
+               artwork_bytes=ARTWORK_BYTES, out_dir=None):
+    """
+    Render every card spec and yield ``RenderedCard`` tuples in spec order, for callers that consume the
+    images themselves (see imposition and the encoder stage of ``render_deck``).
+
+    At most *max_pending* chunks (default: two per worker) are rendered ahead of the consumer, so a slow
+    consumer does not pile up rendered cards in memory. The image is None for cards that failed.
+    *share_artwork* and *artwork_bytes* are as for ``render_deck``; sharing reads all specs up front.
+    Output paths are only filled in when *out_dir* is given.
+    """
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or workers * 2
+    plans = {}
+
+    def prepared():
+        for index, spec in enumerate(specs):
+            spec = {**(defaults or {}), **spec}
+            output = _output(out_dir, index, spec)
+            yield _prepare(index, spec, output, plans)
+
+    cards = prepared()
+    if share_artwork:
+        cards = list(cards)
+    worker = functools.partial(_render_chunk, save=False)
+    with _pool(workers, cards, share_artwork, artwork_bytes) as executor:
+        for rendered in imap_bounded(worker, chunked(cards, chunk_size), workers, max_pending=max_pending,
+                                     executor=executor):
+            yield from rendered
+
+
+def summarize(results, seconds):
+    done = [result for result in results if not result.error]
+    failed = [result for result in results if result.error]
+    render_times = sorted(result.render_seconds for result in done)
+    return {
+        "cards": len(done),
+        "failed": len(failed),
+        "seconds": round(seconds, 3),
+        "cards_per_sec": round(len(done) / seconds, 2) if seconds else None,
+        "render_ms_mean": round(sum(render_times) / len(done) * 1e3, 2) if done else None,
+        "render_ms_p95": round(render_times[int(len(render_times) * 0.95)] * 1e3, 2) if done else None,
+        "save_ms_mean": round(sum(result.save_seconds for result in done) / len(done) * 1e3, 2) if done else None,
+        "artwork_hits": sum(result.artwork_hit for result in done),
+        "failures": [{"index": result.index, "output": result.output, "error": result.error} for result in failed],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render a deck of cards from a CSV or JSON spec.")
+    parser.add_argument("specs", help="CSV (one card per row) or JSON (list of objects) with CardGenerator arguments")
+    parser.add_argument("out_dir", help="output directory")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="worker processes (0 = one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="cards per task (default: %(default)s)")
+    parser.add_argument("--font-path", help="font for every card that does not set its own")
+    parser.add_argument("--timings", help="write per-card timings as CSV to this file")
+    parser.add_argument("--pdf", help="impose the cards onto sheets in this PDF (in out_dir) instead of writing images")
+    parser.add_argument("--paper", choices=sorted(PAPER_SIZES_CM), default="A4", help="sheet size for --pdf")
+    parser.add_argument("--dpi", type=int, default=300, help="resolution of the cards and sheets for --pdf")
+    parser.add_argument("--share-artwork", action="store_true",
+                        help="decode every picture once into shared memory instead of once per worker")
+    parser.add_argument("--artwork-mb", type=int, default=ARTWORK_BYTES >> 20,
+                        help="artwork cache budget per worker in MiB (default: %(default)s)")
+    parser.add_argument("--encode-preset", choices=sorted(PRESETS), default="default",
+                        help="PNG/JPEG encoder settings; 'proof' trades file size for speed (default: %(default)s)")
+    parser.add_argument("--encoders", type=int, default=0,
+                        help="separate encoder processes, overlapping with rendering (0 = render workers encode)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    defaults = {"encode_preset": args.encode_preset}
+    if args.font_path:
+        defaults["font_path"] = args.font_path
+    artwork_bytes = args.artwork_mb << 20
+    start = time.perf_counter()
+    results = []
+    if args.pdf:
+        defaults["dpi"] = args.dpi
+
+        def images():
+            for card in iter_cards(load_specs(args.specs), args.jobs or None, args.chunk_size, defaults,
+                                   share_artwork=args.share_artwork, artwork_bytes=artwork_bytes):
+                results.append(card.result)
+                if card.result.error:
+                    print(f"Error while rendering card {card.result.index}: {card.result.error}", file=sys.stderr)
+                else:
+                    yield card.image
+
+        os.makedirs(args.out_dir, exist_ok=True)
+        pages = impose(images(), os.path.join(args.out_dir, args.pdf), args.paper, args.dpi)
+        print(f"Imposed {len(results)} cards onto {pages} {args.paper} pages")
+    else:
+        for result in render_deck(load_specs(args.specs), args.out_dir, args.jobs or None, args.chunk_size, defaults,
+                                  args.share_artwork, artwork_bytes, args.encoders):
+            if result.error:
+                print(f"Error while rendering card {result.index}: {result.error}", file=sys.stderr)
+            results.append(result)
+
+    if args.timings:
+        with open(args.timings, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CardResult._fields)
+            writer.writerows(sorted(results))
+    print(json.dumps(summarize(results, time.perf_counter() - start), indent=2))
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
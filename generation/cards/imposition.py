@@ -0,0 +1,190 @@
+"""
+Impose card images onto printable sheets and stream them into one multi-page PDF.
+
+Cards are laid out in a grid centred on A4 or Letter paper at the cards' dpi, with crop marks in the margin
+on every cut line. Sheets are written to the PDF one at a time as they fill up, so only the sheet being
+filled is held in memory, however long the deck.
+
+Pillow's ``save_all`` collects every ``append_images`` entry before writing, and ``append=True`` re-reads
+the whole cross-reference chain on every call (quadratic in the page count), so the pages are written
+directly with Pillow's ``PdfParser``: one JPEG image object, content stream and page object per sheet,
+followed by the page tree and the cross-reference table.
+
+    impose(card_images, "deck.pdf", paper="A4", dpi=300)
+"""
+import collections
+import io
+import itertools
+
+from PIL import Image, ImageDraw, PdfParser
+
+PAPER_SIZES_CM = {
+    "A4": (21.0, 29.7),
+    "Letter": (21.59, 27.94),
+}
+
+SheetLayout = collections.namedtuple("SheetLayout", ["page_size", "card_size", "columns", "rows", "origin"])
+
+
+def cm_to_px(cm, dpi):
+    return int(round(cm / 2.54 * dpi))
+
+
+def sheet_layout(card_size, paper="A4", dpi=300, margin_cm=0.5, landscape=False):
+    """
+    Grid of *card_size* cards that fits on *paper* inside *margin_cm*, centred on the page.
+
+    Raises ValueError if not even one card fits.
+    """
+    try:
+        width_cm, height_cm = PAPER_SIZES_CM[paper]
+    except KeyError:
+        raise ValueError(f"Unknown paper '{paper}'. Choose from {', '.join(PAPER_SIZES_CM)}.")
+    if landscape:
+        width_cm, height_cm = height_cm, width_cm
+    page_size = (cm_to_px(width_cm, dpi), cm_to_px(height_cm, dpi))
+    margin = cm_to_px(margin_cm, dpi)
+
+    columns = (page_size[0] - 2 * margin) // card_size[0]
+    rows = (page_size[1] - 2 * margin) // card_size[1]
+    if columns < 1 or rows < 1:
+        raise ValueError(f"A {card_size[0]}x{card_size[1]} px card does not fit on {paper} with these margins.")
+    origin = (
+        (page_size[0] - columns * card_size[0]) // 2,
+        (page_size[1] - rows * card_size[1]) // 2,
+    )
+    return SheetLayout(page_size, tuple(card_size), columns, rows, origin)
+
+
+def _blank_sheet(layout, dpi, crop_marks=True):
+    """White sheet with the crop marks of *layout*; copied for every page."""
+    sheet = Image.new("RGB", layout.page_size, "white")
+    if not crop_marks:
+        return sheet
+
+    draw = ImageDraw.Draw(sheet)
+    (left, top), (card_width, card_height) = layout.origin, layout.card_size
+    right = left + layout.columns * card_width
+    bottom = top + layout.rows * card_height
+    offset = cm_to_px(0.1, dpi)  # keep the marks clear of the cut
+    length = min(cm_to_px(0.5, dpi), left - offset, top - offset)
+    width = max(1, dpi // 150)
+    if length < 1:
+        return sheet
+
+    for x in range(left, right + 1, card_width):
+        draw.line([(x, top - offset - length), (x, top - offset)], fill="black", width=width)
+        draw.line([(x, bottom + offset), (x, bottom + offset + length)], fill="black", width=width)
+    for y in range(top, bottom + 1, card_height):
+        draw.line([(left - offset - length, y), (left - offset, y)], fill="black", width=width)
+        draw.line([(right + offset, y), (right + offset + length, y)], fill="black", width=width)
+    return sheet
+
+
+def iter_sheets(cards, layout, dpi=300, crop_marks=True):
+    """Yield one sheet image per ``columns * rows`` cards of *cards* (the last one may be partly empty)."""
+    blank = _blank_sheet(layout, dpi, crop_marks)
+    per_sheet = layout.columns * layout.rows
+    cards = iter(cards)
+    while True:
+        batch = list(itertools.islice(cards, per_sheet))
+        if not batch:
+            return
+        sheet = blank.copy()
+        for slot, card in enumerate(batch):
+            if card.size != layout.card_size:
+                raise ValueError(f"All cards must be {layout.card_size[0]}x{layout.card_size[1]} px.")
+            row, column = divmod(slot, layout.columns)
+            sheet.paste(card, (layout.origin[0] + column * layout.card_size[0],
+                               layout.origin[1] + row * layout.card_size[1]))
+        yield sheet
+
+
+class PdfSheetWriter:
+    """
+    Write RGB pages into a PDF one at a time.
+
+        with PdfSheetWriter("deck.pdf", dpi=300) as pdf:
+            for sheet in sheets:
+                pdf.add_page(sheet)
+    """
+
+    def __init__(self, path, dpi=300, quality=95):
+        self.dpi = dpi
+        self.quality = quality
+        self.page_count = 0
+        self._file = open(path, "w+b")
+        self._pdf = PdfParser.PdfParser(f=self._file, mode="w+b")
+        self._pdf.start_writing()
+        self._pdf.write_header()
+        # the page tree is written last, but every page has to point at it
+        self._pages_ref = self._pdf.next_object_id(0)
+
+    def add_page(self, image):
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        encoded = io.BytesIO()
+        image.save(encoded, format="JPEG", quality=self.quality)
+        width_pt, height_pt = (size * 72.0 / self.dpi for size in image.size)
+
+        image_ref = self._pdf.write_obj(
+            None,
+            stream=encoded.getvalue(),
+            Type=PdfParser.PdfName("XObject"),
+            Subtype=PdfParser.PdfName("Image"),
+            Width=image.width,
+            Height=image.height,
+            Filter=PdfParser.PdfName("DCTDecode"),
+            BitsPerComponent=8,
+            ColorSpace=PdfParser.PdfName("DeviceRGB"),
+        )
+        contents_ref = self._pdf.write_obj(None, stream=b"q %f 0 0 %f 0 0 cm /image Do Q\n" % (width_pt, height_pt))
+        page_ref = self._pdf.write_obj(
+            None,
+            Type=PdfParser.PdfName("Page"),
+            Parent=self._pages_ref,
+            Resources=PdfParser.PdfDict(
+                ProcSet=[PdfParser.PdfName("PDF"), PdfParser.PdfName("ImageC")],
+                XObject=PdfParser.PdfDict(image=image_ref),
+            ),
+            MediaBox=[0, 0, width_pt, height_pt],
+            Contents=contents_ref,
+        )
+        self._pdf.pages.append(page_ref)
+        self.page_count += 1
+
+    def close(self):
+        if self._pdf is None:
+            return
+        pdf = self._pdf
+        self._pdf = None
+        pdf.write_obj(
+            self._pages_ref, Type=PdfParser.PdfName("Pages"), Count=len(pdf.pages), Kids=pdf.pages
+        )
+        root_ref = pdf.write_obj(None, Type=PdfParser.PdfName("Catalog"), Pages=self._pages_ref)
+        pdf.write_xref_and_trailer(root_ref)
+        pdf.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def impose(cards, output_path, paper="A4", dpi=300, margin_cm=0.5, landscape=False, crop_marks=True, quality=95):
+    """
+    Impose the card images of *cards* (any iterable, consumed lazily) onto sheets written to *output_path*.
+
+    All cards must have the size of the first one. Returns the number of pages.
+    """
+    cards = iter(cards)
+    first = next(cards, None)
+    if first is None:
+        raise ValueError("No cards to impose.")
+    layout = sheet_layout(first.size, paper, dpi, margin_cm, landscape)
+    with PdfSheetWriter(output_path, dpi, quality) as pdf:
+        for sheet in iter_sheets(itertools.chain([first], cards), layout, dpi, crop_marks):
+            pdf.add_page(sheet)
+    return pdf.page_count
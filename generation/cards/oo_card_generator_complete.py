@@ -1,5 +1,13 @@
 import pathlib
-from PIL import Image, ImageDraw, ImageFont
+
+from PIL import ImageDraw
+
+from card_encoder import DEFAULT_PRESET, encode_card
+from card_layout import compile_layout, load_font, load_image, render
+
+# bundled with the repository, so the default card renders from any working directory
+DEFAULT_FONT = pathlib.Path(__file__).resolve().parents[2] / "fonts" / "Lato-Bold.ttf"
+
 
 class CardGenerator:
     def __init__(
@@ -23,16 +31,20 @@ class CardGenerator:
         attack=None,  # Optional attack value
         defense=None,  # Optional defense value
         mana=None,  # Optional mana value
-        stats_position="bottom-right"  # Position for stats (bottom-left or bottom-right)
+        stats_position="bottom-right",  # Position for stats (bottom-left or bottom-right)
+        width=None,  # Width in pixels, instead of width_cm
+        height=None,  # Height in pixels, instead of height_cm
+        layout=None,  # Layout dict (see card_layout) instead of the built-in one
+        encode_preset=DEFAULT_PRESET,  # PNG/JPEG encoder settings (see card_encoder)
     ):
         # Convert cm to inches first, then to pixels using DPI
         width_inch = width_cm / 2.54  # Convert cm to inches
         height_inch = height_cm / 2.54  # Convert cm to inches
-        self.width = int(width_inch * dpi)  # Width in pixels
-        self.height = int(height_inch * dpi)  # Height in pixels
-        
+        self.width = width or int(width_inch * dpi)  # Width in pixels
+        self.height = height or int(height_inch * dpi)  # Height in pixels
+
         self.card_color = card_color
-        self.font_path = font_path or "../fonts/Disney.ttf"
+        self.font_path = font_path or str(DEFAULT_FONT)
         self.font_color = font_color
         self.title_text = title_text
         self.content_text = content_text
@@ -45,87 +57,74 @@ class CardGenerator:
         self.image_ratio = image_ratio
         self.dpi = dpi
         self.quality = quality
-        
+        self.encode_preset = encode_preset
+
         # New attributes for stats
         self.attack = attack
         self.defense = defense
         self.mana = mana
         self.stats_position = stats_position
-        
+
+        self.layout = layout
+        self._plan = None
         self.canvas = None
         self.img = None
 
-    def create_card_base(self):
-        """Initialize the card with base color."""
-        self.img = Image.new("RGB", (self.width, self.height), color=self.card_color)
-        self.canvas = ImageDraw.Draw(self.img)
-
-    def load_font(self, size=48):
-        """Load the specified font or fall back to default."""
-        try:
-            return ImageFont.truetype(self.font_path, size)
-        except IOError:
-            print(f"Font not found at {self.font_path}. Using default font.")
-            return ImageFont.load_default()
-
-    def add_image(self):
-        """Add an optional image to the card."""
-        if not self.image_path:
-            return
-
-        image_path = pathlib.Path(self.image_path)
-        if not image_path.exists():
-            print(f"Image not found at {image_path}. Skipping image addition.")
-            return
-
-        top_img = Image.open(image_path).convert("RGB")
-        max_width = self.width
-        max_height = int(self.height * self.image_ratio)
-
-        if self.keep_aspect_ratio:
-            original_width, original_height = top_img.size
-            aspect_ratio = original_width / original_height
-            if original_width > max_width or original_height > max_height:
-                if aspect_ratio > 1:  # Wider than tall
-                    new_width = max_width
-                    new_height = int(max_width / aspect_ratio)
-                else:  # Taller than wide
-                    new_height = max_height
-                    new_width = int(max_height * aspect_ratio)
-            else:
-                new_width, new_height = original_width, original_height
-
-            top_img = top_img.resize((new_width, new_height))
-        else:
-            top_img = top_img.resize((max_width, max_height))
-
-        x_offset = (self.width - top_img.width) // 2
-        if self.image_position == "top":
-            y_offset = self.image_margin
-        else:  # "bottom"
-            y_offset = self.height - top_img.height - self.image_margin
-
-        self.img.paste(top_img, (x_offset, y_offset))
-
-    def add_text(self, text, position, font_size):
-        """Add text to the card."""
-        font = self.load_font(font_size)
-        text_bbox = self.canvas.textbbox((0, 0), text, font=font)
-        text_width, text_height = text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1]
-
-        if position == "title":
-            x_pos = (self.width - text_width) // 2
-            y_pos = int(self.height * self.image_ratio + (self.height * 0.2 - text_height) / 2)
-        elif position == "content":
-            x_pos = (self.width - text_width) // 2
-            y_pos = int(self.height * 0.7)
-        else:
-            raise ValueError("Position must be 'title' or 'content'.")
-
-        self.canvas.text((x_pos, y_pos), text, font=font, fill=self.font_color)
-
-    def add_stats(self):
-        """Add optional stats (attack, defense, mana) to the bottom left or right."""
+    def default_layout(self):
+        """The classic card as a layout: artwork, centred title, wrapped content and a stats line."""
+        if self.stats_position not in ("bottom-left", "bottom-right"):
+            raise ValueError("Stats position must be 'bottom-left' or 'bottom-right'.")
+        margin = self.image_margin / self.height
+        image_top = margin if self.image_position == "top" else 1 - self.image_ratio - margin
+        return {
+            "size": (self.width, self.height),
+            "background": self.card_color,
+            "font": self.font_path,
+            "color": self.font_color,
+            "layers": [
+                {
+                    "type": "image",
+                    "field": "image_path",
+                    "box": (0, image_top, 1, self.image_ratio),
+                    "fit": "contain" if self.keep_aspect_ratio else "stretch",
+                    "valign": "top" if self.image_position == "top" else "bottom",
+                },
+                {
+                    "type": "text",
+                    "field": "title_text",
+                    "box": (0, self.image_ratio, 1, 0.2),
+                    "size": self.title_font_size,
+                },
+                {
+                    "type": "text",
+                    "field": "content_text",
+                    "box": (0, 0.7, 1, 0.25),
+                    "size": self.content_font_size,
+                    "min_size": max(1, self.content_font_size // 2),  # long texts shrink to fit
+                    "valign": "top",
+                    "wrap": True,
+                    "padding": 10,
+                },
+                {
+                    "type": "text",
+                    "field": "stats",
+                    "size": 20,  # Smaller font for stats
+                    "align": self.stats_position.split("-")[1],
+                    "valign": "bottom",
+                    "padding": 10,
+                },
+            ],
+        }
+
+    @property
+    def plan(self):
+        """Compiled render plan of the layout (validated once per generator)."""
+        if self._plan is None:
+            self._plan = compile_layout(self.layout or self.default_layout())
+        return self._plan
+
+    def card_data(self):
+        """The per-card values the layout fields refer to."""
         stats_text = ""
         if self.attack is not None:
             stats_text += f"Attack: {self.attack} "
@@ -133,54 +132,44 @@ class CardGenerator:
             stats_text += f"Defense: {self.defense} "
         if self.mana is not None:
             stats_text += f"Mana: {self.mana}"
+        return {
+            "title_text": self.title_text,
+            "content_text": self.content_text,
+            "image_path": self.image_path,
+            "stats": stats_text.strip(),
+        }
 
-        if stats_text:
-            font = self.load_font(20)  # Smaller font for stats
-            text_bbox = self.canvas.textbbox((0, 0), stats_text, font=font)
-            text_width, text_height = text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1]
+    def load_font(self, size=48):
+        """Load the specified font (shared through font_cache); raises OSError if it cannot be loaded."""
+        return load_font(self.font_path, size)
 
-            if self.stats_position == "bottom-right":
-                x_pos = self.width - text_width - 10  # Padding from right
-                y_pos = self.height - text_height - 10  # Padding from bottom
-            elif self.stats_position == "bottom-left":
-                x_pos = 10  # Padding from left
-                y_pos = self.height - text_height - 10  # Padding from bottom
-            else:
-                raise ValueError("Stats position must be 'bottom-left' or 'bottom-right'.")
+    def render_card(self, image_loader=load_image):
+        """
+        Draw the card with all elements and return the image (nothing is saved).
 
-            self.canvas.text((x_pos, y_pos), stats_text, font=font, fill=self.font_color)
+        *image_loader(path, size, fit)* provides the fitted artwork, see card_layout.render.
+        """
+        self.img = render(self.plan, self.card_data(), image_loader)
+        self.canvas = ImageDraw.Draw(self.img)
+        return self.img
 
-    def save_card(self, output_path="card_output.png"):
+    def save_card(self, output_path="card_output.png", verbose=True):
         """Save the generated card to a file."""
-        output_path = pathlib.Path(output_path)
-        image_format = output_path.suffix.upper()[1:]  # Get the file extension
-        if image_format not in {"PNG", "JPG", "JPEG"}:
-            raise ValueError("Unsupported file format. Use PNG or JPG/JPEG.")
-
-        self.img.save(
-            output_path,
-            format=image_format,
-            dpi=(self.dpi, self.dpi),
-            quality=self.quality if image_format in {"JPG", "JPEG"} else None,
-        )
-        print(f"Card saved at: {output_path}")
+        encode_card(self.img, output_path, self.dpi, self.quality, self.encode_preset)
+        if verbose:
+            print(f"Card saved at: {output_path}")
 
     def save_card_as_pdf(self, output_path="card_output.pdf"):
         """Save the generated card as a PDF."""
         output_path = pathlib.Path(output_path)
-        pdf_img = self.img.convert("RGB")  # Ensure image is in RGB mode for PDF
+        # cards are drawn in RGB already; only convert what PDF cannot store
+        pdf_img = self.img if self.img.mode == "RGB" else self.img.convert("RGB")
         pdf_img.save(output_path, format="PDF", resolution=self.dpi)
         print(f"Card saved as PDF at: {output_path}")
 
     def generate_card(self, output_path="card_output.png"):
-        """Generate the card with all elements."""
-        self.create_card_base()
-        self.add_image()
-        if self.title_text:
-            self.add_text(self.title_text, "title", font_size=self.title_font_size)
-        if self.content_text:
-            self.add_text(self.content_text, "content", font_size=self.content_font_size)
-        self.add_stats()  # Add the stats if provided
+        """Generate the card with all elements and save it."""
+        self.render_card()
         self.save_card(output_path)
 
 
@@ -0,0 +1,122 @@
+"""
+Paragraph layout for card text: word wrap into a box and shrink the font until the paragraph fits.
+
+Measuring text is the slow part of drawing it, so words are measured once per font and lines are measured
+as the sum of their words and spaces. The font size is found by binary search between the preferred size
+and a minimum instead of trying every size in turn, and whole layouts are memoized per (text, box, font), so
+reprinting a card or rendering a deck with recurring text does not shape it again.
+
+    paragraph = layout_paragraph(text, "../../fonts/Lato-Bold.ttf", 32, width=700, height=250, min_size=16)
+    font = load_font(paragraph.font_path, paragraph.size)
+    y = top
+    for line in paragraph.lines:
+        draw.text((left, y), line, font=font)
+        y += paragraph.line_height
+"""
+import collections
+import functools
+import pathlib
+import sys
+import weakref
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent))
+from font_cache import get_font  # noqa: E402
+
+# words measured per font; a font that leaves font_cache takes its widths with it
+_word_widths = weakref.WeakKeyDictionary()
+MAX_WORDS_PER_FONT = 1 << 16
+
+ParagraphLayout = collections.namedtuple(
+    "ParagraphLayout", ["font_path", "size", "lines", "widths", "line_height", "height", "fits"],
+)
+
+
+def load_font(path, size):
+    """
+    TrueType font from font_cache.
+
+    There is no fallback: Pillow's default bitmap font has a single size (so text could not be shrunk to fit)
+    and, before Pillow 10, no ``getlength``.
+    """
+    try:
+        return get_font(path, size)
+    except OSError as ex:
+        raise OSError(f"Cannot load the TrueType font at {path}: {ex}") from ex
+
+
+def word_width(font, word):
+    """Advance width of *word* in *font*, measured once per font."""
+    widths = _word_widths.get(font)
+    if widths is None:
+        widths = _word_widths.setdefault(font, {})
+    width = widths.get(word)
+    if width is None:
+        if len(widths) >= MAX_WORDS_PER_FONT:
+            widths.clear()
+        width = widths[word] = font.getlength(word)
+    return width
+
+
+def wrap(font, text, width=None):
+    """
+    Break *text* into lines no wider than *width* pixels (None: only at explicit newlines).
+
+    Returns ``(lines, widths)``. Lines are filled greedily; a word wider than *width* gets a line of its own.
+    """
+    space = word_width(font, " ")
+    lines = []
+    widths = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        line_start = 0
+        line_width = 0.0
+        for index, word in enumerate(words):
+            advance = word_width(font, word)
+            if index > line_start and width is not None and line_width + space + advance > width:
+                lines.append(" ".join(words[line_start:index]))
+                widths.append(line_width)
+                line_start = index
+                line_width = advance
+            else:
+                line_width += advance + (space if index > line_start else 0)
+        lines.append(" ".join(words[line_start:]))
+        widths.append(line_width)
+    return lines, widths
+
+
+def _layout(text, font_path, size, width, height, wrap_lines, line_spacing):
+    font = load_font(font_path, size)
+    lines, widths = wrap(font, text, width if wrap_lines else None)
+    ascent, descent = font.getmetrics()
+    line_height = round((ascent + descent) * line_spacing)
+    block_height = line_height * (len(lines) - 1) + ascent + descent
+    fits = block_height <= height and max(widths) <= width
+    return ParagraphLayout(font_path, size, tuple(lines), tuple(widths), line_height, block_height, fits)
+
+
+@functools.lru_cache(maxsize=4096)
+def layout_paragraph(text, font_path, size, width, height, min_size=None, wrap=True, line_spacing=1.0):
+    """
+    Lay out *text* in a *width* x *height* pixel box at *size*, shrinking it to no less than *min_size*
+    (default: no shrinking) until it fits.
+
+    Returns the ``ParagraphLayout`` at the largest size that fits, or at *min_size* with ``fits`` False
+    if even that overflows. Memoized: identical arguments return the same layout without measuring.
+    """
+    best = _layout(text, font_path, size, width, height, wrap, line_spacing)
+    if best.fits or not min_size or min_size >= size:
+        return best
+    smallest = _layout(text, font_path, min_size, width, height, wrap, line_spacing)
+    if not smallest.fits:
+        return smallest
+
+    # smallest fits and size does not: narrow down the largest fitting size in between
+    best, low, high = smallest, min_size + 1, size - 1
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = _layout(text, font_path, middle, width, height, wrap, line_spacing)
+        if candidate.fits:
+            best, low = candidate, middle + 1
+        else:
+            high = middle - 1
+    return best
@@ -0,0 +1,66 @@
+"""
+Process-wide cache of loaded TrueType fonts.
+
+Parsing a TTF takes milliseconds, which dominates rendering a small image, so fonts are loaded once
+per (path, size, index, layout engine) and shared. The cache is an LRU bounded by ``maxsize`` entries,
+safe to use from several threads, and keeps hit/miss counters.
+
+    from font_cache import get_font, preload, stats
+
+    preload([("arial.ttf", 36), ("../fonts/Lato-Bold.ttf", 24)])  # at startup
+    font = get_font("arial.ttf", 36)
+"""
+import collections
+import os
+import threading
+
+from PIL import ImageFont
+
+maxsize = 128
+
+_fonts = collections.OrderedDict()
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def get_font(path, size, index=0, layout_engine=None):
+    """
+    Return the cached ``ImageFont.truetype(path, size, index, layout_engine)``, loading it on first use.
+
+    Raises the same ``OSError`` as ``ImageFont.truetype`` when the font cannot be loaded; failures are not cached.
+    """
+    global _hits, _misses
+    key = (os.fspath(path), size, index, layout_engine)
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _fonts.move_to_end(key)
+            _hits += 1
+            return font
+        _misses += 1
+
+    font = ImageFont.truetype(key[0], size, index=index, layout_engine=layout_engine)
+    with _lock:
+        font = _fonts.setdefault(key, font)
+        while len(_fonts) > maxsize:
+            _fonts.popitem(last=False)
+    return font
+
+
+def preload(specs):
+    """Load every ``(path, size[, index[, layout_engine]])`` in *specs*, e.g. at process startup."""
+    for spec in specs:
+        get_font(*spec)
+
+
+def stats():
+    with _lock:
+        return {"hits": _hits, "misses": _misses, "size": len(_fonts), "maxsize": maxsize}
+
+
+def clear():
+    global _hits, _misses
+    with _lock:
+        _fonts.clear()
+        _hits = _misses = 0
@@ -0,0 +1,88 @@
+"""
+Pre-rendered glyph masks for high-volume text rendering (captchas).
+
+Every glyph is rasterized once per font and size, optionally together with rotated variants, and text is
+composed by alpha-blitting the cached masks with ``ImageDraw.bitmap`` instead of shaping and rasterizing
+it on every call. Glyphs are laid out by their advance widths (no kerning), which is what a captcha needs.
+"""
+import functools
+import random
+import string
+
+from PIL import Image, ImageDraw
+
+from font_cache import get_font
+
+
+class GlyphAtlas:
+    def __init__(self, font, alphabet=string.ascii_letters, angles=(0,)):
+        """
+        Args:
+            font (ImageFont.FreeTypeFont): Font to rasterize.
+            alphabet (str): Glyphs rendered up front; others are added the first time they are used.
+            angles (tuple): Rotations in degrees; every glyph gets one variant per angle.
+        """
+        self.font = font
+        self.angles = tuple(angles) or (0,)
+        self.glyphs = {}
+        for char in alphabet:
+            self._rasterize(char)
+
+    def _rasterize(self, char):
+        """Store ``(advance, [(mask, dx, dy), ...])`` for *char*, one mask per angle."""
+        left, top, right, bottom = self.font.getbbox(char)
+        mask = Image.new("L", (max(1, right - left), max(1, bottom - top)))
+        ImageDraw.Draw(mask).text((-left, -top), char, font=self.font, fill=255)
+
+        variants = []
+        for angle in self.angles:
+            if angle:
+                # rotate around the glyph centre and keep that centre in place
+                rotated = mask.rotate(angle, resample=Image.BICUBIC, expand=True)
+                dx = left + (mask.width - rotated.width) / 2
+                dy = top + (mask.height - rotated.height) / 2
+                variants.append((rotated, round(dx), round(dy)))
+            else:
+                variants.append((mask, left, top))
+
+        self.glyphs[char] = (self.font.getlength(char), variants)
+        return self.glyphs[char]
+
+    def layout(self, text, rng=random):
+        """Return the glyph placements ``[(mask, x, y), ...]`` relative to the text origin, and their bbox."""
+        placements = []
+        x = 0.0
+        for char in text:
+            advance, variants = self.glyphs.get(char) or self._rasterize(char)
+            mask, dx, dy = variants[0] if len(variants) == 1 else rng.choice(variants)
+            placements.append((mask, round(x) + dx, dy))
+            x += advance
+
+        if not placements:
+            return placements, (0, 0, 0, 0)
+        bbox = (
+            min(px for _, px, _ in placements),
+            min(py for _, _, py in placements),
+            max(px + mask.width for mask, px, _ in placements),
+            max(py + mask.height for mask, _, py in placements),
+        )
+        return placements, bbox
+
+    def draw_centered(self, draw, size, text, fill, rng=random):
+        """
+        Draw *text* centred in an image of *size*.
+
+        Like ``captcha_generator._center_coords`` the text origin is placed so that the bbox width and height
+        are centred, then every glyph mask is blitted in *fill*.
+        """
+        placements, bbox = self.layout(text, rng)
+        origin_x = round((size[0] - (bbox[2] - bbox[0])) / 2)
+        origin_y = round((size[1] - (bbox[3] - bbox[1])) / 2)
+        for mask, x, y in placements:
+            draw.bitmap((origin_x + x, origin_y + y), mask, fill=fill)
+
+
+@functools.lru_cache(maxsize=32)
+def get_atlas(font_path, size, angles=(0,), alphabet=string.ascii_letters):
+    """Shared atlas for a (font, size, angles) combination."""
+    return GlyphAtlas(get_font(font_path, size), alphabet, angles)
@@ -1,44 +1,278 @@
+"""
+Bulk watermarking of existing images.
+
+The mark is a line of text laid along the page diagonal (or at a fixed angle), sized to a fraction of the
+diagonal. Drawing and rotating it costs far more than blending it, so the rotated mark is rendered once per
+(config, page size bucket) and cached in every worker: pages whose sizes round to the same multiple of
+``bucket`` pixels share one mark. Only the region the mark covers is blended; the rest of the page is
+untouched.
+
+In tiled mode the mark repeats over the whole page instead, in rows offset by half a tile. One rotated tile is
+rendered, and the full-page overlay is built from it by array tiling (``np.tile``) rather than pasting tile
+after tile. The overlay is cached per page size and blended onto the page in a single pass.
+
+Inputs are streamed: paths are read lazily from the arguments, directories or stdin and handed to a process
+pool in chunks, with a bounded number of chunks in flight. Outputs keep the input's format and path relative
+to its directory, are written to a temporary name and renamed, and existing outputs are skipped, so an
+interrupted run can be started again.
+
+    python image_watermarking.py photos/ -o marked/ --text "© Example" --font arial.ttf -j 0
+    python image_watermarking.py photos/ -o marked/ --tiled --scale 0.15 --opacity 0.2
+    find photos -name '*.jpg' | python image_watermarking.py - -o marked/ --opacity 0.3
+"""
+import argparse
+import collections
+import dataclasses
+import functools
+import math
+import os
+import sys
+import time
+
 import numpy as np
-from PIL import Image
-from PIL import ImageFont, ImageDraw
+from PIL import Image, ImageColor, ImageDraw
+
+from font_cache import get_font
+from parallel import chunked, imap_bounded
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff", ".bmp", ".gif"}
+
+WatermarkResult = collections.namedtuple("WatermarkResult", ["path", "output", "seconds", "error"])
+
+
+@dataclasses.dataclass(frozen=True)
+class WatermarkConfig:
+    """
+    Args:
+        text (str): Watermark text.
+        font_path (str): TrueType font.
+        color (tuple | str): RGB colour or colour name.
+        opacity (float): 0 (invisible) to 1.
+        angle (float): Rotation in degrees, counter-clockwise; None follows the page diagonal.
+        scale (float): Length of the text as a fraction of the page diagonal.
+        bucket (int): Page sizes are rounded to multiples of this many pixels when caching marks.
+        tiled (bool): Repeat the mark over the whole page.
+        spacing (float): Tiled mode: extra room around each tile, as a fraction of the tile size.
+    """
+
+    text: str = "Watermark"
+    font_path: str = "arial.ttf"
+    color: tuple = (0, 0, 0)
+    opacity: float = 0.5
+    angle: float = None
+    scale: float = 0.5
+    bucket: int = 64
+    tiled: bool = False
+    spacing: float = 0.0
+
+    def __post_init__(self):
+        if not self.text:
+            raise ValueError("Watermark text must not be empty.")
+        color = ImageColor.getrgb(self.color) if isinstance(self.color, str) else tuple(self.color)
+        if len(color) != 3:
+            raise ValueError("Color must be an RGB tuple or a colour name.")
+        object.__setattr__(self, "color", color)
+        if not 0 <= self.opacity <= 1:
+            raise ValueError("Opacity must be between 0 and 1.")
+        if self.scale <= 0 or self.bucket < 1:
+            raise ValueError("Scale and bucket must be positive.")
+        if self.spacing < 0:
+            raise ValueError("Spacing must not be negative.")
+
+
+def size_bucket(size, bucket):
+    """*size* rounded to the nearest multiple of *bucket* (at least one bucket) in each dimension."""
+    return tuple(max(bucket, round(side / bucket) * bucket) for side in size)
+
+
+@functools.lru_cache(maxsize=64)
+def watermark_mask(config, size):
+    """
+    The rotated mark for pages of *size* as an "L" mask whose values are the opacity of each pixel.
+
+    Cached per (config, size); callers pass a bucketed size (see ``size_bucket``) so that similar pages
+    share it.
+    """
+    width, height = size
+    angle = config.angle if config.angle is not None else math.degrees(math.atan2(height, width))
+    # size the font so the text spans its share of the diagonal, measured at a reference size
+    reference = 100
+    text_length = get_font(config.font_path, reference).getlength(config.text)
+    font_size = max(1, int(reference * math.hypot(width, height) * config.scale / text_length))
+    font = get_font(config.font_path, font_size)
+
+    left, top, right, bottom = font.getbbox(config.text)
+    mask = Image.new("L", (right - left, bottom - top), 0)
+    ImageDraw.Draw(mask).text((-left, -top), config.text, font=font, fill=round(255 * config.opacity))
+    return mask.rotate(angle, resample=Image.BICUBIC, expand=True)
+
+
+@functools.lru_cache(maxsize=8)
+def tiled_mask(config, size):
+    """
+    The repeating mark covering a whole page of *size*, as an "L" mask; cached per (config, size).
+
+    The tile is ``watermark_mask`` for the page's size bucket, padded by ``config.spacing``; every other row
+    is shifted by half a tile.
+    """
+    tile = np.asarray(watermark_mask(config, size_bucket(size, config.bucket)))
+    pad_y, pad_x = (round(side * config.spacing / 2) for side in tile.shape)
+    tile = np.pad(tile, ((pad_y, pad_y), (pad_x, pad_x)))
+    block = np.vstack((tile, np.roll(tile, tile.shape[1] // 2, axis=1)))
+    width, height = size
+    reps = (-(-height // block.shape[0]), -(-width // block.shape[1]))
+    return Image.fromarray(np.ascontiguousarray(np.tile(block, reps)[:height, :width]))
+
+
+def apply_watermark(image, config):
+    """
+    Watermark *image* and return it: in place if it is RGB or RGBA, otherwise on a converted copy (RGBA if
+    it has transparency, else RGB).
+
+    The mark is centred on the page and only the overlapping region is blended; a tiled mark is blended
+    over the whole page at once.
+    """
+    if image.mode != "RGBA" and ("transparency" in image.info or image.mode in ("LA", "PA")):
+        image = image.convert("RGBA")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+
+    if config.tiled:
+        mask = tiled_mask(config, image.size)
+        x = y = 0
+    else:
+        mask = watermark_mask(config, size_bucket(image.size, config.bucket))
+        x = (image.width - mask.width) // 2
+        y = (image.height - mask.height) // 2
+    # overlap of the mark and the page, in mask coordinates
+    box = (max(0, -x), max(0, -y), min(mask.width, image.width - x), min(mask.height, image.height - y))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return image
+    if box != (0, 0, mask.width, mask.height):
+        mask = mask.crop(box)
+    dest = (x + box[0], y + box[1])
+
+    if image.mode == "RGBA":
+        mark = Image.new("RGBA", mask.size, config.color + (0,))
+        mark.putalpha(mask)
+        image.alpha_composite(mark, dest)
+    else:
+        # a solid colour pasted through the mask is a straight alpha blend of just that box
+        image.paste(config.color, dest + (dest[0] + mask.width, dest[1] + mask.height), mask)
+    return image
+
+
+def watermark_file(path, output, config, quality=95):
+    """Watermark the image at *path* and write it to *output* in the same format."""
+    with Image.open(path) as img:
+        image_format = img.format
+        info = {key: img.info[key] for key in ("dpi", "icc_profile", "exif") if img.info.get(key)}
+        img.load()
+        image = apply_watermark(img, config)
+        if image_format == "JPEG":
+            info["quality"] = quality
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        tmp_output = output + ".tmp"
+        image.save(tmp_output, format=image_format, **info)
+    os.replace(tmp_output, output)
+
+
+def _watermark_chunk(config, quality, jobs):
+    """Pool worker: watermark ``(path, output)`` pairs, one ``WatermarkResult`` each."""
+    results = []
+    for path, output in jobs:
+        start = time.perf_counter()
+        try:
+            watermark_file(path, output, config, quality)
+        except Exception as ex:
+            results.append(WatermarkResult(path, output, time.perf_counter() - start, str(ex)))
+        else:
+            results.append(WatermarkResult(path, output, time.perf_counter() - start, None))
+    return results
+
 
+def iter_inputs(sources):
+    """
+    Yield ``(path, relative output name)`` for *sources*: image files, directories (walked recursively,
+    lazily) or "-" for paths read from stdin, one per line.
+    """
+    for source in sources:
+        if source == "-":
+            for line in sys.stdin:
+                path = line.rstrip("\n")
+                if path:
+                    yield path, os.path.basename(path)
+        elif os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                        path = os.path.join(root, name)
+                        yield path, os.path.relpath(path, source)
+        else:
+            yield source, os.path.basename(source)
 
-def main():
-    # sample dimensions
-    pdf_width = 1000
-    pdf_height = 1500
 
-    text_to_be_rotated = 'Watermark'
-    message_length = len(text_to_be_rotated)
+def watermark_files(inputs, out_dir, config, workers=None, chunk_size=16, max_pending=None, quality=95,
+                    overwrite=False):
+    """
+    Watermark every ``(path, relative output name)`` of *inputs* into *out_dir* and yield a
+    ``WatermarkResult`` per image, in input order.
 
-    # load font (tweak ratio based on your particular font)
-    font_ratio = 1.5
-    diagonal_percentage = 0.5
-    diagonal_length = int(np.sqrt((pdf_width ** 2) + (pdf_height ** 2)))
-    diagonal_to_use = diagonal_length * diagonal_percentage
-    font_size = int(diagonal_to_use / (message_length / font_ratio))
-    font = ImageFont.truetype("arial", font_size)
-    # font = ImageFont.load_default() # fallback
+    *inputs* is consumed lazily: at most *max_pending* chunks (default: two per worker) are queued at a
+    time, so arbitrarily long listings run in constant memory. Existing outputs are skipped unless
+    *overwrite* is set.
+    """
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or workers * 2
+    jobs = (
+        (path, os.path.join(out_dir, name)) for path, name in inputs
+        if overwrite or not os.path.exists(os.path.join(out_dir, name))
+    )
+    worker = functools.partial(_watermark_chunk, config, quality)
+    for results in imap_bounded(worker, chunked(jobs, chunk_size), workers, max_pending=max_pending):
+        yield from results
 
-    image = Image.new('RGBA', (pdf_width, pdf_height), (0, 128, 0, 92))
 
-    # watermark
-    opacity = int(256 * 0.5)
-    mark_width, mark_height = font.getsize(text_to_be_rotated)
-    watermark = Image.new('RGBA', (mark_width, mark_height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(watermark)
-    draw.text((0, 0), text=text_to_be_rotated, font=font, fill=(0, 0, 0, opacity))
-    angle = np.degrees(np.arctan(pdf_height / pdf_width))
-    watermark = watermark.rotate(angle, expand=1)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Watermark images in bulk.")
+    parser.add_argument("inputs", nargs="+", help="image files, directories, or - to read paths from stdin")
+    parser.add_argument("--out-dir", "-o", required=True, help="output directory")
+    parser.add_argument("--text", default="Watermark")
+    parser.add_argument("--font", default="arial.ttf", help="TrueType font (default: %(default)s)")
+    parser.add_argument("--color", default="black", help="colour name or #rrggbb (default: %(default)s)")
+    parser.add_argument("--opacity", type=float, default=0.5, help="0-1 (default: %(default)s)")
+    parser.add_argument("--angle", type=float, default=None, help="degrees (default: along the diagonal)")
+    parser.add_argument("--scale", type=float, default=0.5,
+                        help="text length as a fraction of the page diagonal (default: %(default)s)")
+    parser.add_argument("--tiled", action="store_true", help="repeat the mark over the whole page")
+    parser.add_argument("--spacing", type=float, default=0.0,
+                        help="tiled mode: room around each tile as a fraction of its size (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="worker processes (0 = one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="images per task (default: %(default)s)")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality (default: %(default)s)")
+    parser.add_argument("--overwrite", action="store_true", help="redo images whose output exists")
+    return parser.parse_args(argv)
 
-    # merge
-    wx, wy = watermark.size
-    px = int((pdf_width - wx) / 2)
-    py = int((pdf_height - wy) / 2)
-    image.paste(watermark, (px, py, px + wx, py + wy), watermark)
 
-    image.show()
+def main(argv=None):
+    args = parse_args(argv)
+    config = WatermarkConfig(args.text, args.font, args.color, args.opacity, args.angle, args.scale,
+                             tiled=args.tiled, spacing=args.spacing)
+    start = time.perf_counter()
+    done = failed = 0
+    for result in watermark_files(iter_inputs(args.inputs), args.out_dir, config, args.jobs or None,
+                                  args.chunk_size, quality=args.quality, overwrite=args.overwrite):
+        if result.error:
+            failed += 1
+            print(f"Error while watermarking {result.path}: {result.error}", file=sys.stderr)
+        else:
+            done += 1
+    elapsed = time.perf_counter() - start
+    rate = f", {done / elapsed:.0f} images/sec" if done else ""
+    print(f"Watermarked {done} images in {elapsed:.2f} s{rate}" + (f", {failed} failed" if failed else ""))
+    return 1 if failed else 0
 
 
-if __name__ == '__main__':
-    main()
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 import io
 import pathlib
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+from font_cache import get_font
 
 here = pathlib.Path(__file__).parent.absolute()
 
@@ -12,7 +14,7 @@ def main():
     img = Image.new('RGB', (image_width, image_height), color=(51, 144, 255))
 
     canvas = ImageDraw.Draw(img)
-    font = ImageFont.truetype('../../fonts/Lato-Bold.ttf', size=24)
+    font = get_font('../../fonts/Lato-Bold.ttf', 24)
     text_width, text_height = canvas.textsize('Text in image', font=font)
 
     print(f"Text width: {text_width}")
@@ -0,0 +1,69 @@
+"""
+Bounded parallel map over a process pool.
+
+Shared by the tools in simple/ and generation/, which put this directory on ``sys.path`` as for font_cache.
+Inputs are consumed lazily and only a bounded number of items is in flight, so long inputs run in constant
+memory.
+
+    for results in imap_bounded(render_chunk, chunked(specs, 32), workers=4, max_pending=8):
+        ...
+"""
+import collections
+import contextlib
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+
+def imap_bounded(func, items, workers=None, ordered=True, max_pending=None, executor=None):
+    """
+    Apply *func* to every element of *items*, yielding the results as they become available.
+
+    Args:
+        func (callable): Module-level function so it can be pickled to the worker processes.
+        items (iterable): Work items. Consumed lazily, so generators are fine.
+        workers (int): Number of processes. ``None`` or ``1`` runs everything in the calling process,
+            ``0`` uses one process per CPU.
+        ordered (bool): Yield results in the order of *items* instead of completion order.
+        max_pending (int): Maximum number of submitted but not yet reported items.
+            Defaults to four per worker, which keeps every core busy without queueing the whole input.
+        executor (Executor): Submit to this executor (e.g. a pool with a worker initializer) instead of
+            starting a pool of *workers*; it is left running. *workers* then only sizes the default *max_pending*.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    if executor is None and (not workers or workers == 1):
+        for item in items:
+            yield func(item)
+        return
+
+    max_pending = max_pending or (workers or 1) * 4
+    items = iter(items)
+
+    with contextlib.ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        pending = collections.deque(
+            executor.submit(func, item) for item in itertools.islice(items, max_pending)
+        )
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+
+            for future in done:
+                yield future.result()
+
+            for item in itertools.islice(items, len(done)):
+                pending.append(executor.submit(func, item))
+
+
+def chunked(items, size):
+    """Lazily split *items* into lists of *size* elements (the last one may be shorter)."""
+    items = iter(items)
+    return iter(lambda: list(itertools.islice(items, size)), [])
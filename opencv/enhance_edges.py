@@ -0,0 +1,31 @@
+"""
+Pillow contrast enhancement (simple/enhance_text.py) chained with OpenCV Canny edge detection
+(example.OpenCVUtilities.detect_edges) in memory, through pil_bridge.
+"""
+import pathlib
+import sys
+
+from PIL import Image
+
+from example import OpenCVUtilities
+from pil_bridge import to_array, to_pil
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "simple"))
+from enhance_text import enhance_contrast  # noqa: E402
+
+
+def enhance_and_detect_edges(img, factor=8.0, low_threshold=100, high_threshold=200):
+    """
+    Return the Canny edges of the contrast-enhanced *img* as a Pillow "L" image.
+
+    The image is reduced to one channel before the contrast step, the enhanced frame is copied out
+    of Pillow once for OpenCV, and the edge map OpenCV returns is wrapped for Pillow without a copy.
+    """
+    enhanced = enhance_contrast(img.convert("L"), factor)
+    edges = OpenCVUtilities.detect_edges(to_array(enhanced), low_threshold, high_threshold)
+    return to_pil(edges)
+
+
+if __name__ == "__main__":
+    with Image.open(sys.argv[1] if len(sys.argv) > 1 else "image.jpg") as source:
+        enhance_and_detect_edges(source).save("edges.png")
@@ -0,0 +1,71 @@
+"""
+Pass images between Pillow and NumPy/OpenCV without round trips through disk or extra copies.
+
+NumPy -> Pillow is zero-copy for the 8-bit layouts Pillow can map: single channel ("L") and four
+channel ("RGBA"). The Pillow image reads straight from the array memory; Pillow treats it as read-only
+and copies it only if the image is modified in place. Pillow keeps 3-channel images in 4 bytes per pixel,
+so RGB/BGR arrays need exactly one copy.
+
+Pillow -> NumPy costs one copy (Pillow's internal buffer is not exposed), except for images that were
+created by ``to_pil``, which hand back the array they wrap.
+
+BGR <-> RGB is a negatively strided view of the channel axis, not a copy.
+"""
+import numpy as np
+from PIL import Image
+
+# (dtype, channels) -> Pillow mode, for the layouts that can be shared as-is
+_SHARED_MODES = {
+    (np.dtype(np.uint8), 1): "L",
+    (np.dtype(np.uint8), 4): "RGBA",
+}
+
+
+def swap_rb(array):
+    """BGR <-> RGB as a view of *array*; no pixels are copied."""
+    if array.ndim != 3 or array.shape[2] != 3:
+        raise ValueError("swap_rb expects a (height, width, 3) array.")
+    return array[:, :, ::-1]
+
+
+def to_pil(array, bgr=False):
+    """
+    Wrap *array* as a Pillow image, sharing its memory when the layout allows it.
+
+    Args:
+        array (np.ndarray): ``(h, w)`` or ``(h, w, channels)`` image.
+        bgr (bool): The channels are in OpenCV order (BGR/BGRA).
+    """
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    if bgr and channels >= 3:
+        if channels == 4:
+            # there is no strided view from BGRA to RGBA
+            array = array[:, :, [2, 1, 0, 3]]
+        else:
+            array = swap_rb(array)
+
+    mode = _SHARED_MODES.get((array.dtype, channels))
+    if mode is None or not array.flags.c_contiguous:
+        return Image.fromarray(np.ascontiguousarray(array))
+
+    height, width = array.shape[:2]
+    img = Image.frombuffer(mode, (width, height), array, "raw", mode, 0, 1)
+    # keep the array alive and let to_array hand it back
+    img.shared_array = array
+    return img
+
+
+def to_array(img, bgr=False):
+    """
+    Return the pixels of *img* as an array (read-only when it was copied out of Pillow).
+
+    Args:
+        img (PIL.Image.Image): Source image.
+        bgr (bool): Return 3-channel images in OpenCV channel order, as a view.
+    """
+    array = getattr(img, "shared_array", None)
+    if array is None or not img.readonly:
+        array = np.asarray(img)
+    if bgr and array.ndim == 3 and array.shape[2] == 3:
+        array = swap_rb(array)
+    return array
@@ -0,0 +1,117 @@
+"""
+Compare the resize profiles (see profiles.py) on a set of images.
+
+For every profile this reports the mean time per image (open, resize and encode), the mean encoded size
+and the mean SSIM of the decoded output against a reference: a full decode resized with LANCZOS and
+never encoded.
+
+    python benchmark_profiles.py photos/ --ratio 0.1
+    python benchmark_profiles.py a.jpg b.jpg --max-size 512 --json
+"""
+import argparse
+import io
+import json
+import os
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image
+
+from profiles import PROFILES, resize, save_options
+from scanner import scan_images
+
+
+def ssim(img1, img2, window=7):
+    """Mean structural similarity of two same-sized images, computed on their luminance."""
+    a = np.asarray(img1.convert("L"), dtype=np.float64)
+    b = np.asarray(img2.convert("L"), dtype=np.float64)
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    def local_mean(x):
+        return sliding_window_view(x, (window, window)).mean(axis=(-1, -2))
+
+    mu_a, mu_b = local_mean(a), local_mean(b)
+    var_a = local_mean(a * a) - mu_a ** 2
+    var_b = local_mean(b * b) - mu_b ** 2
+    cov = local_mean(a * b) - mu_a * mu_b
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(ssim_map.mean())
+
+
+def _target_size(size, ratio, max_size):
+    scale = min(1.0, max_size / max(size)) if max_size else ratio
+    return (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+
+
+def benchmark(paths, ratio=0.1, max_size=None, repeat=3):
+    """Return ``{profile: {"ms_per_image", "bytes", "ssim"}}`` averaged over *paths*."""
+    totals = {name: {"seconds": 0.0, "bytes": 0, "ssim": 0.0} for name in PROFILES}
+
+    for path in paths:
+        with Image.open(path) as img:
+            size = _target_size(img.size, ratio, max_size)
+            fmt = img.format
+            reference = img.resize(size, Image.LANCZOS)
+
+        for name, profile in PROFILES.items():
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with Image.open(path) as img:
+                    resized = resize(img, size, profile)
+                buffer = io.BytesIO()
+                resized.save(buffer, format=fmt, **save_options(profile, format=fmt))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            totals[name]["seconds"] += best
+            totals[name]["bytes"] += buffer.tell()
+            buffer.seek(0)
+            with Image.open(buffer) as encoded:
+                totals[name]["ssim"] += ssim(reference, encoded)
+
+    count = len(paths)
+    return {
+        name: {
+            "ms_per_image": round(1000 * total["seconds"] / count, 2),
+            "bytes": int(total["bytes"] / count),
+            "ssim": round(total["ssim"] / count, 4),
+        }
+        for name, total in totals.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the resize profiles.")
+    parser.add_argument("inputs", nargs="+", help="image files or directories")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--ratio", type=float, default=0.1, help="resize ratio (default: %(default)s)")
+    size.add_argument("--max-size", type=int, help="cap the longest edge instead of using a ratio")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per image, the best one counts")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    paths = []
+    for each in args.inputs:
+        if os.path.isdir(each):
+            paths.extend(entry.path for entry in scan_images(each))
+        else:
+            paths.append(each)
+    if not paths:
+        parser.error("no images found")
+
+    results = benchmark(paths, args.ratio, args.max_size, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(paths)} image(s)")
+    print(f"{'profile':<10} {'ms/image':>10} {'bytes':>10} {'ssim':>8}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['ms_per_image']:>10} {result['bytes']:>10} {result['ssim']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,108 +1,40 @@
-import random
-import string
+"""
+Simple captcha example, on top of the captcha renderer in generation/captcha_generator.py.
 
-from PIL import Image, ImageDraw, ImageFont
+The config, renderer and exporter live there only. That module has the same name as this one, so it is
+loaded from its path under another name; ``SimpleCaptcha`` here defaults to its "simple" style (white text,
+dots, full-width lines and arcs).
+"""
+import importlib.util
+import pathlib
+import sys
 
+_GENERATION = pathlib.Path(__file__).resolve().parent.parent / "generation"
+# font_cache and glyph_atlas are imported by bare name over there
+sys.path.append(str(_GENERATION))
 
-class SimpleCaptchaException(Exception):
-    pass
 
+def _load_generation_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # dataclasses and pickle look the module up by name
+    spec.loader.exec_module(module)
+    return module
 
-class SimpleCaptcha(object):
-    def __init__(
-        self,
-        length=5,
-        size=(200, 100),
-        fontsize=36,
-        random_text=None,
-        random_bgcolor=None,
-    ):
-        self.size = size
-        self.text = "CAPTCHA"
-        self.fontsize = fontsize
-        self.bgcolor = 255
-        self.length = length
 
-        self.image = None  # current captcha image
-        if random_text:
-            self.text = self._random_text()
+_captcha = _load_generation_module("generation_captcha_generator", _GENERATION / "captcha_generator.py")
 
-        if not self.text:
-            raise SimpleCaptchaException("Field text must not be empty.")
+CaptchaConfig = _captcha.CaptchaConfig
+SimpleCaptchaException = _captcha.SimpleCaptchaException
+render_captcha = _captcha.render_captcha
 
-        if not self.size:
-            raise SimpleCaptchaException("Size must not be empty.")
 
-        if not self.fontsize:
-            raise SimpleCaptchaException("Font size must be defined.")
-
-        if random_bgcolor:
-            self.bgcolor = self._random_color()
-
-    def _center_coords(self, draw, font):
-        width, height = draw.textsize(self.text, font)
-        xy = (self.size[0] - width) / 2.0, (self.size[1] - height) / 2.0
-        return xy
-
-    def _add_noise_dots(self, draw):
-        size = self.image.size
-        for _ in range(int(size[0] * size[1] * 0.1)):
-            draw.point(
-                (random.randint(0, size[0]), random.randint(0, size[1])), fill="white"
-            )
-        return draw
-
-    def _add_noise_lines(self, draw):
-        size = self.image.size
-        for _ in range(8):
-            width = random.randint(1, 2)
-            start = (0, random.randint(0, size[1] - 1))
-            end = (size[0], random.randint(0, size[1] - 1))
-            draw.line([start, end], fill="white", width=width)
-        for _ in range(8):
-            start = (-50, -50)
-            end = (size[0] + 10, random.randint(0, size[1] + 10))
-            draw.arc(start + end, 0, 360, fill="white")
-        return draw
-
-    def get_captcha(self, size=None, text=None, bgcolor=None):
-        if text is not None:
-            self.text = text
-        if size is not None:
-            self.size = size
-        if bgcolor is not None:
-            self.bgcolor = bgcolor
-
-        self.image = Image.new('RGB', self.size, self.bgcolor)
-        font = ImageFont.truetype('arial.ttf', self.fontsize)
-        draw = ImageDraw.Draw(self.image)
-        xy = self._center_coords(draw, font)
-        draw.text(xy=xy, text=self.text, font=font)
-
-        # Add some dot noise
-        draw = self._add_noise_dots(draw)
-
-        # Add some random lines
-        draw = self._add_noise_lines(draw)
-
-        self.image.save('temp.jpg')
-        return self.image, self.text
-
-    def _random_text(self):
-        letters = string.ascii_lowercase + string.ascii_uppercase
-        random_text = ""
-        for _ in range(self.length):
-            random_text += random.choice(letters)
-        print(random_text)
-        return random_text
-
-    def _random_color(self):
-        r = random.randint(0, 255)
-        g = random.randint(0, 255)
-        b = random.randint(0, 255)
-        return (r, g, b)
+class SimpleCaptcha(_captcha.SimpleCaptcha):
+    def __init__(self, length=5, size=(200, 100), fontsize=36, random_text=None, random_bgcolor=None, seed=None,
+                 style="simple"):
+        super().__init__(length, size, fontsize, random_text, random_bgcolor, seed, style=style)
 
 
 if __name__ == "__main__":
     sc = SimpleCaptcha(length=7, fontsize=36, random_text=True, random_bgcolor=True)
-    sc.get_captcha()
+    sc.get_captcha(output='temp.jpg')
@@ -2,10 +2,14 @@ import os
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 
 
+def enhance_contrast(pix, factor=8.0):
+    """Contrast boost used before edge enhancement/detection."""
+    return ImageEnhance.Contrast(pix).enhance(factor)
+
+
 def main(path: str):
     pix = Image.open(os.path.join(path, 'input.jpg'))
-    e = ImageEnhance.Contrast(pix)
-    e.enhance(8.0).filter(ImageFilter.EDGE_ENHANCE).save('edge_enhance.jpg')
+    enhance_contrast(pix).filter(ImageFilter.EDGE_ENHANCE).save('edge_enhance.jpg')
     ac = ImageEnhance.Contrast(ImageOps.autocontrast(pix))
     ac.enhance(2.5).save('auto_contrast_enhance.jpg')
 
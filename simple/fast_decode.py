@@ -0,0 +1,30 @@
+"""
+Decode-time downscaling for JPEG sources.
+
+The JPEG decoder can scale the DCT blocks by 1/2, 1/4 or 1/8 while decoding, so a 24 MP photo that is
+going to be shrunk to 10% never has to be decoded at full resolution. ``Image.draft`` picks the
+largest of those reductions that still leaves the image at least as big as the requested size;
+the remaining (less than 2x) reduction is done with a regular high-quality resample.
+
+Other formats ignore the draft request and are decoded and resized as usual.
+"""
+from PIL import Image
+
+
+def draft_resize(img, size, resample=Image.LANCZOS, reducing_gap=None):
+    """
+    Resize a freshly opened (not yet loaded) *img* to *size*.
+
+    Args:
+        img (PIL.Image.Image): Image returned by ``Image.open``. Drafting only works before the pixels are loaded.
+        size (tuple): Target (width, height) in pixels.
+        resample (int): Filter used for the final resample.
+        reducing_gap (float): Passed to ``Image.resize``.
+    """
+    box = None
+    if size[0] > 0 and size[1] > 0 and size[0] * 2 <= img.size[0] and size[1] * 2 <= img.size[1]:
+        drafted = img.draft(img.mode, size)
+        if drafted is not None:
+            # the decoded image is rounded up to whole pixels; *box* is the exact scaled source area
+            box = drafted[1]
+    return img.resize(size, resample, box=box, reducing_gap=reducing_gap)
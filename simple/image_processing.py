@@ -1,55 +1,223 @@
+import collections
 import os
+import pathlib
 import sys
 from PIL import Image
 
+from profiles import DEFAULT_PROFILE, get_profile, resize, save_options
+from scanner import scan_images
+from thumbnail_manifest import ThumbnailManifest, file_digest
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "generation"))
+from parallel import imap_bounded  # noqa: E402
+
+ThumbnailResult = collections.namedtuple(
+    "ThumbnailResult", ["source", "thumbnail", "error", "sha256", "skipped"], defaults=(None, None, False)
+)
+
+
+def _scaled_size(size, ratio):
+    return (int(size[0] * ratio), int(size[1] * ratio))
+
+
+def _make_thumbnail(job):
+    """Resize a single image. Runs inside the worker processes, so errors are returned, not raised."""
+    src, dst, ratio, profile, band_height, digest = job
+    try:
+        sha256 = file_digest(src) if digest else None
+        with Image.open(src) as img:
+            thumb_size = _scaled_size(img.size, ratio)
+            resized = resize(img, thumb_size, profile, band_height)
+        resized.save(dst, **save_options(profile, dst))
+    except Exception as ex:
+        return ThumbnailResult(src, dst, str(ex))
+    return ThumbnailResult(src, dst, None, sha256)
+
+
+def _level_size(size, level):
+    """A float *level* is a ratio, an int the longest edge in pixels (never enlarging the image)."""
+    if isinstance(level, float):
+        return _scaled_size(size, level)
+    scale = min(1.0, level / max(size))
+    return (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+
+
+def _job_outputs(job):
+    """What a result of *job* reports as ``thumbnail``: the output path, or a tuple of them for a pyramid."""
+    outputs = job[1]
+    return outputs if isinstance(outputs, str) else tuple(dst for _, dst in outputs)
+
+
+def _make_pyramid(job):
+    """Decode an image once and write every pyramid level, each resized from the next larger one."""
+    src, outputs, profile, band_height, digest = job
+    dsts = _job_outputs(job)
+    try:
+        sha256 = file_digest(src) if digest else None
+        with Image.open(src) as img:
+            levels = sorted(
+                ((_level_size(img.size, level), dst) for level, dst in outputs),
+                key=lambda level: level[0][0] * level[0][1],
+                reverse=True,
+            )
+            current = resize(img, levels[0][0], profile, band_height)
+        for size, dst in levels:
+            if current.size != size:
+                current = current.resize(size, profile.resample)
+            current.save(dst, **save_options(profile, dst))
+    except Exception as ex:
+        return ThumbnailResult(src, dsts, str(ex))
+    return ThumbnailResult(src, dsts, None, sha256)
+
 
 class Thumbnailer:
     def __init__(self, src_folder=None):
         self.src_folder = src_folder
         self.ratio = 0.3
         self.thumbnail_folder = "thumbnails"
+        # name of a resize/encoder profile from profiles.PROFILES ("fast", "balanced", "archival")
+        self.profile = DEFAULT_PROFILE
+        # resample huge sources in bands of this many rows to bound memory (None = whole image at once)
+        self.band_height = None
 
-    def _create_thumbnails_folder(self):
-        thumb_path = os.path.join(self.src_folder, self.thumbnail_folder)
+    def _create_thumbnails_folder(self, subfolder=""):
+        thumb_path = os.path.join(self.src_folder, self.thumbnail_folder, subfolder)
         if not os.path.isdir(thumb_path):
             os.makedirs(thumb_path)
 
-    def _build_thumb_path(self, image_path):
+    def _build_thumb_path(self, image_path, subfolder=""):
         root = os.path.dirname(image_path)
         name, ext = os.path.splitext(os.path.basename(image_path))
         suffix = ".thumbnail"
-        return os.path.join(root, self.thumbnail_folder, name + suffix + ext)
+        return os.path.join(root, self.thumbnail_folder, subfolder, name + suffix + ext)
 
-    def _load_files(self):
-        files = set()
-        for each in os.listdir(self.src_folder):
-            each = os.path.abspath(self.src_folder + '/' + each)
-            if os.path.isfile(each):
-                files.add(each)
+    def _manifest_path(self, kind=""):
+        return os.path.join(self.src_folder, self.thumbnail_folder + kind + ".manifest.json")
 
-        return files
+    def _load_files(self, onerror=None):
+        """Lazily yield a ``scanner.ScanEntry`` for every image directly inside the source folder."""
+        return scan_images(self.src_folder, recursive=False, onerror=onerror)
 
     def _thumb_size(self, size):
-        return (int(size[0] * self.ratio), int(size[1] * self.ratio))
+        return _scaled_size(size, self.ratio)
 
-    def create_thumbnails(self):
+    def _run(self, worker, build_job, params, manifest_path, workers, ordered, max_pending):
+        """
+        Feed ``build_job(path)`` for every source file to *worker*, yielding a ``ThumbnailResult`` per file.
+
+        The folder is scanned lazily, so the first files are processed while it is still being listed.
+        With a *manifest_path*, sources recorded there with the same *params* and unchanged content are
+        skipped, and once the whole folder has been seen the outputs of sources that no longer exist are deleted.
+        Nothing is deleted after an incomplete scan: a folder that cannot be listed raises ``OSError``.
+        """
+        manifest = ThumbnailManifest(manifest_path) if manifest_path else None
+        seen = set()
+        stats = {}
+        skipped = []
+        scan_errors = []
+
+        def jobs():
+            for entry in self._load_files(onerror=scan_errors.append):
+                job = build_job(entry.path)
+                if manifest is not None:
+                    seen.add(entry.path)
+                    if manifest.is_current(entry.path, entry.size, entry.mtime_ns, params):
+                        skipped.append(ThumbnailResult(entry.path, _job_outputs(job), None, skipped=True))
+                        continue
+                    stats[entry.path] = entry
+                yield job
+
+        try:
+            for result in imap_bounded(worker, jobs(), workers=workers, ordered=ordered, max_pending=max_pending):
+                yield from skipped
+                skipped.clear()
+                entry = stats.pop(result.source, None)
+                if entry is not None and not result.error:
+                    outputs = result.thumbnail if isinstance(result.thumbnail, tuple) else [result.thumbnail]
+                    manifest.update(result.source, entry.size, entry.mtime_ns, result.sha256, params, outputs)
+                yield result
+            yield from skipped
+            if manifest is not None and not scan_errors:
+                manifest.prune(seen)
+        finally:
+            if manifest is not None:
+                manifest.save()
+
+    def iter_thumbnails(self, workers=None, ordered=False, max_pending=None, incremental=False):
+        """
+        Create the thumbnails, yielding a ``ThumbnailResult`` per file.
+
+        With *workers* the files are spread over a process pool (see ``parallel.imap_bounded``);
+        *ordered* reports results in input order rather than as soon as each file is done.
+        With *incremental* a manifest stored beside the thumbnail folder is used to skip sources that
+        did not change since the last run and to delete the thumbnails of sources that were removed.
+        """
         self._create_thumbnails_folder()
-        files = self._load_files()
+        profile = get_profile(self.profile)
+        params = {"ratio": self.ratio, "profile": profile.name, "resample": int(profile.resample)}
+        return self._run(
+            _make_thumbnail,
+            lambda each: (each, self._build_thumb_path(each), self.ratio, profile, self.band_height, incremental),
+            params,
+            self._manifest_path() if incremental else None,
+            workers, ordered, max_pending,
+        )
+
+    def iter_pyramid(self, levels, workers=None, ordered=False, max_pending=None, incremental=False):
+        """
+        Create several thumbnails per file from a single decode, yielding a ``ThumbnailResult`` per file.
 
-        for each in files:
-            print("Processing: " + each)
-            try:
-                img = Image.open(each)
-                thumb_size = self._thumb_size(img.size)
-                resized = img.resize(thumb_size, Image.ANTIALIAS)
-                savepath = self._build_thumb_path(each)
-                resized.save(savepath)
-            except IOError as ex:
-                print("Error: " + str(ex))
+        *levels* mixes ints (longest edge in pixels) and floats (ratios); every level is written to its
+        own subfolder of the thumbnail folder, e.g. ``thumbnails/256`` or ``thumbnails/0.1``.
+        The other options are the same as for ``iter_thumbnails``; the pyramid keeps its own manifest.
+        """
+        subfolders = [(level, str(level)) for level in levels]
+        for _, subfolder in subfolders:
+            self._create_thumbnails_folder(subfolder)
+        profile = get_profile(self.profile)
+        params = {
+            "levels": [subfolder for _, subfolder in subfolders],
+            "profile": profile.name,
+            "resample": int(profile.resample),
+        }
+        return self._run(
+            _make_pyramid,
+            lambda each: (
+                each,
+                [(level, self._build_thumb_path(each, subfolder)) for level, subfolder in subfolders],
+                profile,
+                self.band_height,
+                incremental,
+            ),
+            params,
+            self._manifest_path(".pyramid") if incremental else None,
+            workers, ordered, max_pending,
+        )
+
+    @staticmethod
+    def _report(results):
+        reported = []
+        for result in results:
+            if result.skipped:
+                print("Unchanged: " + result.source)
+            elif result.error:
+                print("Error: " + result.source + ": " + result.error)
+            else:
+                print("Processed: " + result.source)
+            reported.append(result)
+        return reported
+
+    def create_thumbnails(self, workers=None, ordered=False, max_pending=None, incremental=False):
+        """Create every thumbnail and return the list of results; failed files carry their error message."""
+        return self._report(self.iter_thumbnails(workers, ordered, max_pending, incremental))
+
+    def create_pyramid(self, levels, workers=None, ordered=False, max_pending=None, incremental=False):
+        """Create every pyramid level of every file and return the list of results, see ``iter_pyramid``."""
+        return self._report(self.iter_pyramid(levels, workers, ordered, max_pending, incremental))
 
 
 if __name__ == "__main__":
-    assert len(sys.argv) == 2
+    assert len(sys.argv) in (2, 3)
     src_folder = sys.argv[1]
 
     if not os.path.isdir(src_folder):
@@ -64,5 +232,19 @@ if __name__ == "__main__":
     # 0.1 means the original image will be resized to 10% of its size
     thumbs.ratio = 0.1
 
+    # trade quality for throughput ("fast") or the other way round ("archival")
+    thumbs.profile = "balanced"
+
     # will create set of images in temporary folder
-    thumbs.create_thumbnails()
+    # an optional second argument sets the number of worker processes (0 = one per CPU)
+    workers = int(sys.argv[2]) if len(sys.argv) == 3 else None
+    # only rebuild thumbnails whose source changed since the previous run
+    results = thumbs.create_thumbnails(workers=workers, incremental=True)
+
+    # alternatively, build several sizes per file from a single decode, one subfolder per size
+    # results = thumbs.create_pyramid([1024, 512, 256, 128, 64], workers=workers, incremental=True)
+
+    failed = [result for result in results if result.error]
+    skipped = [result for result in results if result.skipped]
+    print(f"{len(results) - len(failed) - len(skipped)} thumbnails created, "
+          f"{len(skipped)} unchanged, {len(failed)} failed.")
@@ -1,65 +1,205 @@
+import argparse
+import collections
+import json
 import os
+import pathlib
 import sys
+import time
 
 from PIL import Image
 
+from profiles import DEFAULT_PROFILE, PROFILES, resize, save_options
+from scanner import scan_images
 
-def main_dir_worker(d='.'):
-    for root, dirs, files in os.walk(d):
-        for f in files:
-            if f.endswith(".py"):
-                print(os.path.join(root, f))  # full path
-                print(f)  # the actual name
-            if f.endswith(".jpg"):
-                process_image(os.path.join(root, f))
-                print("jpg")
+sys.path.append(str(pathlib.Path(__file__).resolve().parent.parent / "generation"))
+from parallel import imap_bounded  # noqa: E402
 
+ResizeResult = collections.namedtuple(
+    "ResizeResult", ["source", "output", "bytes_in", "bytes_out", "error", "skipped"], defaults=(None, False)
+)
 
-def process_image(image_file='image.jpg'):
-    try:
-        img_org = Image.open(image_file)
-        # get the size of the original image
-        print(img_org.size)
-        width_org, height_org = img_org.size
-
-        # set the resizing factor so the aspect ratio can be retained
-        # factor > 1.0 increases size
-        # factor < 1.0 decreases size
-        factor = 1
-        width = int(width_org * factor)
-        height = int(height_org * factor)
-
-        # best down-sizing filter
-        img_anti = img_org.resize((width, height), Image.ANTIALIAS)
-
-        # split image filename into name and extension
+
+def _target_size(size, factor=1, max_size=None):
+    # with *max_size* the longest edge is capped (images are never enlarged),
+    # otherwise *factor* > 1.0 increases size and *factor* < 1.0 decreases size
+    scale = min(1.0, max_size / max(size)) if max_size else factor
+    return (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+
+
+# outputs written next to their sources carry this marker, e.g. ``photo.resized-0.5.jpg``
+OUTPUT_MARKER = ".resized-"
+
+
+def _suffix(factor=1, max_size=None):
+    return OUTPUT_MARKER + ("{}px".format(max_size) if max_size else "{:g}".format(factor))
+
+
+def process_image(image_file='image.jpg', new_image_file=None, factor=1, max_size=None, profile=DEFAULT_PROFILE,
+                  band_height=None):
+    """
+    Resize *image_file* and return the path it was saved to. Errors are raised to the caller.
+
+    The result is written to a temporary name and then renamed, so an interrupted run never leaves a
+    truncated output that ``--resume`` would take for finished.
+
+    With *band_height* the source is resampled in bands of that many rows (see tiled_resize),
+    which keeps memory bounded for very large scans.
+    """
+    with Image.open(image_file) as img_org:
+        # resample filter and encoder settings come from the profile
+        # (large JPEG reductions are partly done by the decoder, see fast_decode)
+        img_anti = resize(img_org, _target_size(img_org.size, factor, max_size), profile, band_height)
+
+    if new_image_file is None:
+        # split image filename into name and extension and create a new file name for saving the result
         name, ext = os.path.splitext(image_file)
+        new_image_file = "{}{}{}".format(name, _suffix(factor, max_size), ext)
+    ext = os.path.splitext(new_image_file)[1].lower()
+    image_format = Image.registered_extensions().get(ext)
+    if image_format is None:
+        raise ValueError(f"unknown file extension: {ext}")
+    tmp_image_file = new_image_file + ".tmp"
+    img_anti.save(tmp_image_file, format=image_format, **save_options(profile, format=image_format))
+    os.replace(tmp_image_file, new_image_file)
+    return new_image_file
+
+
+def _resize_job(job):
+    """Pool worker: resize one file and report sizes, capturing any error."""
+    src, dst, factor, max_size, profile, band_height = job
+    bytes_in = 0
+    try:
+        bytes_in = os.path.getsize(src)
+        dst = process_image(src, dst, factor, max_size, profile, band_height)
+    except Exception as ex:
+        return ResizeResult(src, dst, bytes_in, 0, str(ex))
+    return ResizeResult(src, dst, bytes_in, os.path.getsize(dst))
 
-        # create a new file name for saving the result
-        new_image_file = "{}{}{}".format(name, str(factor), ext)
-        img_anti.save(new_image_file)
 
-        print("\nResized/processed image file saved as {}".format(new_image_file))
+def _output_path(src, root, output_dir, factor, max_size):
+    if output_dir is None:
+        name, ext = os.path.splitext(src)
+        return "{}{}{}".format(name, _suffix(factor, max_size), ext)
+    dst = os.path.join(output_dir, os.path.relpath(src, root))
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    return dst
 
-        # one way to show the image is to activate
-        # the default viewer associated with the image type
-        import webbrowser
-        webbrowser.open(new_image_file)
-    except Exception as e:
-        print(f'Error while processing image {image_file}: {e}')
-        exit(1)
 
+def _is_up_to_date(src_mtime_ns, dst):
+    try:
+        return os.stat(dst).st_mtime_ns >= src_mtime_ns
+    except OSError:
+        return False
 
-def usage():
-    print('Usage: image_resizer.py <image_file.ext> <new_image_file.ext> (Images can be the same to replace them).')
-    print('\nimage_resizer.py dir <MAIN_IMAGE_DIR>: Will work every image in current dir and subdirs')
 
+def main_dir_worker(d='.', output_dir=None, factor=1, max_size=None, jobs=None, resume=False,
+                    include=None, exclude=None, extensions=(".jpg", ".jpeg"), profile=DEFAULT_PROFILE,
+                    band_height=None):
+    """
+    Resize every image under *d*, yielding a ``ResizeResult`` per file.
 
-if __name__ == '__main__':
-    print(sys.argv)
-    print(len(sys.argv))
-    if len(sys.argv) < 3:
-        main_dir_worker(r'.')
+    Images are resized as the tree is walked, on *jobs* worker processes. A failing file is reported and
+    the batch carries on; with *resume*, files whose output is already newer than the source are skipped,
+    so an interrupted or partly failed run can simply be started again.
+    """
+    exclude = list(exclude or [])
+    if output_dir is None:
+        # outputs are written next to the sources; do not pick up those of any earlier run as inputs
+        exclude.append("*{}*".format(OUTPUT_MARKER))
+    elif os.path.abspath(output_dir).startswith(os.path.abspath(d) + os.sep):
+        exclude.append(os.path.relpath(output_dir, d).replace(os.sep, "/"))
+
+    skipped = []
+
+    def work():
+        for entry in scan_images(d, extensions=extensions, include=include, exclude=exclude):
+            dst = _output_path(entry.path, d, output_dir, factor, max_size)
+            if resume and _is_up_to_date(entry.mtime_ns, dst):
+                skipped.append(ResizeResult(entry.path, dst, entry.size, 0, skipped=True))
+                continue
+            yield entry.path, dst, factor, max_size, profile, band_height
+
+    for result in imap_bounded(_resize_job, work(), workers=jobs, ordered=False):
+        yield from skipped
+        skipped.clear()
+        yield result
+    yield from skipped
+
+
+def summarize(results, seconds):
+    """Machine readable summary of a batch run."""
+    done = [result for result in results if not result.skipped and not result.error]
+    failed = [result for result in results if result.error]
+    return {
+        "files": len(results),
+        "resized": len(done),
+        "skipped": len(results) - len(done) - len(failed),
+        "failed": len(failed),
+        "seconds": round(seconds, 3),
+        "files_per_sec": round(len(done) / seconds, 2) if seconds else None,
+        "bytes_in": sum(result.bytes_in for result in done),
+        "bytes_out": sum(result.bytes_out for result in done),
+        "failures": [{"source": result.source, "error": result.error} for result in failed],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Resize a single image, or every image in a directory tree (in-process, in parallel)."
+    )
+    parser.add_argument("source", nargs="?", default=".", help="image file or directory (default: current dir)")
+    parser.add_argument("destination", nargs="?",
+                        help="output file for a single image, output directory for a tree "
+                             "(default: next to the source, named like photo.resized-0.5.jpg)")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--factor", type=float, default=1, help="resize factor, e.g. 0.5 for half size")
+    size.add_argument("--max-size", type=int, help="cap the longest edge to this many pixels")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="resample filter and encoder settings (default: %(default)s)")
+    parser.add_argument("--band-height", type=int,
+                        help="resample in bands of this many source rows; bounds memory only for uncompressed "
+                             "PPM/BMP/TIFF sources (others are decoded whole, with a warning)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (0 = one per CPU)")
+    parser.add_argument("--resume", action="store_true", help="skip files whose output is already up to date")
+    parser.add_argument("--include", action="append", help="glob of files to process (repeatable)")
+    parser.add_argument("--exclude", action="append", help="glob of files or dirs to skip (repeatable)")
+    parser.add_argument("--summary", help="write the JSON summary to this file instead of stdout")
+    parser.add_argument("--show", action="store_true", help="open a single resized image in the default viewer")
+    args = parser.parse_args(argv)
+    if not os.path.isfile(args.source) and not os.path.isdir(args.source):
+        parser.error(f"source {args.source!r} is neither an image file nor a directory")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    if os.path.isfile(args.source):
+        results = [_resize_job((args.source, args.destination, args.factor, args.max_size, args.profile,
+                                args.band_height))]
+        if args.show and not results[0].error:
+            # one way to show the image is to activate
+            # the default viewer associated with the image type
+            import webbrowser
+            webbrowser.open(results[0].output)
+    else:
+        results = []
+        for result in main_dir_worker(args.source, args.destination, args.factor, args.max_size, args.jobs,
+                                      args.resume, args.include, args.exclude, profile=args.profile,
+                                      band_height=args.band_height):
+            if result.error:
+                print(f'Error while processing image {result.source}: {result.error}', file=sys.stderr)
+            results.append(result)
+
+    summary = json.dumps(summarize(results, time.perf_counter() - start), indent=2)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            f.write(summary)
     else:
-        image_file = sys.argv[1]
-        new_image_file = sys.argv[2]
+        print(summary)
+    return 1 if any(result.error for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Named resample/encoder settings for resized images.
+
+    fast      BILINEAR with a coarse reducing_gap, JPEG quality 75, no optimize pass
+    balanced  BICUBIC with a reducing_gap, JPEG quality 85, optimized Huffman tables
+    archival  LANCZOS on every pixel, JPEG quality 95, progressive and optimized
+
+``benchmark_profiles.py`` measures the speed, size and quality of each one on your own images.
+"""
+import collections
+import os
+
+from PIL import Image
+
+from fast_decode import draft_resize
+from tiled_resize import resize_tiled
+
+ResizeProfile = collections.namedtuple(
+    "ResizeProfile", ["name", "resample", "reducing_gap", "quality", "optimize", "progressive"]
+)
+
+PROFILES = {
+    "fast": ResizeProfile("fast", Image.BILINEAR, 2.0, 75, False, False),
+    "balanced": ResizeProfile("balanced", Image.BICUBIC, 3.0, 85, True, False),
+    "archival": ResizeProfile("archival", Image.LANCZOS, None, 95, True, True),
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(profile=DEFAULT_PROFILE):
+    """Accept either a profile name or a ``ResizeProfile``."""
+    if isinstance(profile, ResizeProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown profile '{profile}'. Choose from {', '.join(PROFILES)}.")
+
+
+def resize(img, size, profile=DEFAULT_PROFILE, band_height=None):
+    """
+    Resize a freshly opened *img* to *size* with the filter of *profile* (JPEG drafting included).
+
+    With *band_height* the image is resampled in bands of that many source rows to bound memory,
+    see tiled_resize.
+    """
+    profile = get_profile(profile)
+    if band_height:
+        return resize_tiled(img, size, profile.resample, band_height)
+    return draft_resize(img, size, profile.resample, profile.reducing_gap)
+
+
+def save_options(profile, path=None, format=None):
+    """Keyword arguments for ``Image.save`` of *path* (or *format*) with the encoder settings of *profile*."""
+    profile = get_profile(profile)
+    if format is None:
+        format = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+    format = (format or "").upper()
+
+    if format == "JPEG":
+        return {"quality": profile.quality, "optimize": profile.optimize, "progressive": profile.progressive}
+    if format == "WEBP":
+        return {"quality": profile.quality, "method": 6 if profile.optimize else 0}
+    if format == "PNG":
+        return {"optimize": profile.optimize}
+    return {}
@@ -23,7 +23,7 @@ def main():
     new_width = int(width_original * resize_factor)
     new_height = int(height_original * resize_factor)
 
-    modified_image = img.resize((new_width, new_height), Image.ANTIALIAS)
+    modified_image = img.resize((new_width, new_height), Image.LANCZOS)
     name, extension = os.path.splitext(image_file)
 
     new_image_file = name + '_modified' + extension
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of the file at *path*."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ThumbnailManifest:
+    """
+    On-disk record of the thumbnails built from a source folder.
+
+    Every entry is keyed by the source path and stores the source size, mtime and content hash,
+    the parameters the thumbnail was built with and where the thumbnail was written.
+    A source whose size and mtime are unchanged is considered current without reading it;
+    if only the stat data changed, the content hash decides.
+    """
+
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.isfile(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == self.version:
+                self.entries = data["entries"]
+
+    def is_current(self, source, size, mtime_ns, params):
+        entry = self.entries.get(source)
+        if entry is None or entry["params"] != params:
+            return False
+        if not all(os.path.isfile(output) for output in entry["outputs"]):
+            return False
+        if entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+            return True
+        if entry["size"] != size or file_digest(source) != entry["sha256"]:
+            return False
+
+        # touched but not modified: remember the new mtime so the file is not hashed again
+        entry["mtime_ns"] = mtime_ns
+        return True
+
+    def update(self, source, size, mtime_ns, sha256, params, outputs):
+        self.entries[source] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": sha256,
+            "params": params,
+            "outputs": list(outputs),
+        }
+
+    def prune(self, sources):
+        """Drop the entries, and delete the thumbnails, of every source not in *sources*."""
+        removed = []
+        for source in set(self.entries) - set(sources):
+            for output in self.entries.pop(source)["outputs"]:
+                if os.path.isfile(output):
+                    os.remove(output)
+            removed.append(source)
+        return removed
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
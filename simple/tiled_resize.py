@@ -0,0 +1,128 @@
+"""
+Memory-bounded resizing of very large images.
+
+The source is resampled in horizontal bands. Every band carries enough extra rows above and below
+for the filter support, and is resized with ``Image.resize(box=...)`` over its exact share of the
+source, so the seams are identical to a single full-frame resize.
+
+Uncompressed files (PPM, BMP, raw TIFF) are memory-mapped and only the rows of the current band are
+ever paged in, so peak memory follows the band height rather than the image size. Compressed formats
+cannot be decoded partially; they are decoded once (JPEGs at the largest DCT reduction that still
+covers the target, see fast_decode) and then resampled band by band, so for them band mode does not bound
+memory and a warning is logged. The output image is always assembled in memory.
+"""
+import logging
+import math
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+_FILTER_SUPPORT = {
+    Image.NEAREST: 0.5,
+    Image.BOX: 0.5,
+    Image.BILINEAR: 1.0,
+    Image.HAMMING: 1.0,
+    Image.BICUBIC: 2.0,
+    Image.LANCZOS: 3.0,
+}
+
+# raw mode -> (channels, channel order of the resulting Pillow mode, Pillow mode)
+_RAW_MODES = {
+    "L": (1, None, "L"),
+    "RGB": (3, None, "RGB"),
+    "BGR": (3, [2, 1, 0], "RGB"),
+    "RGBA": (4, None, "RGBA"),
+    "BGRA": (4, [2, 1, 0, 3], "RGBA"),
+    "RGBX": (4, [0, 1, 2], "RGB"),
+    "BGRX": (4, [2, 1, 0], "RGB"),
+}
+
+
+def _raw_rows(img):
+    """
+    Memory-map the pixel rows of *img* as a ``(height, width, channels)`` array.
+
+    Returns ``(rows, channel_order, mode)``, or ``None`` when the file does not store plain rows.
+    """
+    if not getattr(img, "filename", None) or not img.tile:
+        return None
+
+    width, height = img.size
+    codec, extents, offset, args = img.tile[0]
+    if not isinstance(args, tuple):
+        args = (args,)
+    rawmode, stride, orientation = (args + (0, 1))[:3]
+    if codec != "raw" or rawmode not in _RAW_MODES or orientation not in (1, -1):
+        return None
+
+    channels, order, mode = _RAW_MODES[rawmode]
+    stride = stride or width * channels
+
+    # several full-width strips are fine as long as they follow each other in the file
+    row = 0
+    for tile in img.tile:
+        tile_args = tile[3] if isinstance(tile[3], tuple) else (tile[3],)
+        if (tile[0] != "raw" or tile_args[:1] != (rawmode,) or tile[1][0] != 0 or tile[1][2] != width
+                or tile[1][1] != row or tile[2] != offset + row * stride):
+            return None
+        row = tile[1][3]
+    if row != height:
+        return None
+
+    rows = np.memmap(img.filename, dtype=np.uint8, mode="r", offset=offset, shape=(height, stride))
+    rows = rows[:, : width * channels].reshape(height, width, channels)
+    if orientation == -1:
+        # bottom-up files (BMP)
+        rows = rows[::-1]
+    return rows, order, mode
+
+
+def resize_tiled(img, size, resample=Image.LANCZOS, band_height=1024):
+    """
+    Resize a freshly opened (not yet loaded) *img* to *size*, working in bands of about *band_height* source rows.
+
+    Only uncompressed files are read band by band; anything else is decoded whole first (logged as a
+    warning), so memory is bounded for those inputs only.
+
+    Args:
+        img (PIL.Image.Image): Image returned by ``Image.open``.
+        size (tuple): Target (width, height) in pixels.
+        resample (int): Resampling filter.
+        band_height (int): Source rows resampled at a time (plus the filter margin).
+    """
+    raw = _raw_rows(img)
+    box = (0, 0) + img.size
+    if raw is None:
+        drafted = img.draft(img.mode, size) if size[0] * 2 <= img.size[0] and size[1] * 2 <= img.size[1] else None
+        if drafted is not None:
+            box = drafted[1]
+        logger.warning("%s: %s cannot be read in bands, decoding all %dx%d pixels at once",
+                       getattr(img, "filename", "image"), img.format, box[2], box[3])
+        img.load()
+        if img.mode not in ("L", "RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.mode or "transparency" in img.info else "RGB")
+
+    src_width, src_height = box[2], box[3]
+    scale = src_height / size[1]
+    margin = math.ceil(_FILTER_SUPPORT[resample] * max(scale, 1.0)) + 1
+    out_rows = max(1, int(band_height / scale))
+    out = Image.new(raw[2] if raw else img.mode, size)
+
+    for out_top in range(0, size[1], out_rows):
+        out_bottom = min(out_top + out_rows, size[1])
+        top, bottom = out_top * scale, out_bottom * scale
+        y0 = max(0, math.floor(top) - margin)
+        y1 = min(math.ceil(src_height), math.ceil(bottom) + margin)
+
+        if raw is None:
+            band = img.crop((0, y0, img.size[0], y1))
+        else:
+            rows, order, _ = raw
+            pixels = np.ascontiguousarray(rows[y0:y1] if order is None else rows[y0:y1, :, order])
+            band = Image.fromarray(pixels[..., 0] if pixels.shape[2] == 1 else pixels)
+
+        part = band.resize((size[0], out_bottom - out_top), resample, box=(0, top - y0, src_width, bottom - y0))
+        out.paste(part, (0, out_top))
+    return out